@@ -1,13 +1,38 @@
 import os
 import time
-import json
+import asyncio
 import logging
 import httpx
-from typing import Dict, Any
+import orjson
+from typing import AsyncIterator, Dict, Any, Union
+from urllib.parse import urlencode
 from parser import parse_deepgram_response
 
 logger = logging.getLogger(__name__)
 
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+# Request options never change, so the query string is encoded once at import
+LISTEN_QUERY = urlencode({
+    "model": "nova-3",
+    "smart_format": "true",
+    "punctuate": "true",
+    "paragraphs": "true",
+    "utterances": "true",
+    "sentiment": "true",
+    "intents": "true",
+    "topics": "true",
+    "summarize": "v2",
+    "detect_entities": "true",
+})
+
+
+async def _iter_file(path: Union[str, os.PathLike], chunk_size: int = UPLOAD_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """Yield a file's bytes in chunks, reading off the event loop."""
+    with open(path, "rb") as fh:
+        while chunk := await asyncio.to_thread(fh.read, chunk_size):
+            yield chunk
+
 
 class DeepgramTranscriptionService:
     """
@@ -21,48 +46,48 @@ class DeepgramTranscriptionService:
         if not self.api_key:
             raise ValueError("DEEPGRAM_API_KEY environment variable not set")
         self.base_url = "https://api.deepgram.com/v1/listen"
+        self.listen_url = f"{self.base_url}?{LISTEN_QUERY}"
+        # Long-lived client so keep-alive connections are reused across requests
+        self._client = httpx.AsyncClient(
+            timeout=120.0,
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+            http2=True,
+            headers={"Authorization": f"Token {self.api_key}"},
+        )
         logger.info("Deepgram transcription service initialized")
 
-    async def transcribe(self, audio_buffer: bytes, mimetype: str = "audio/wav") -> Dict[str, Any]:
+    async def aclose(self) -> None:
+        """Close the underlying HTTP connection pool."""
+        await self._client.aclose()
+
+    @staticmethod
+    def _parse_response(content: bytes, start_time: float) -> Dict[str, Any]:
+        return parse_deepgram_response(orjson.loads(content), start_time)
+
+    async def transcribe(
+        self, audio: Union[bytes, str, os.PathLike], mimetype: str = "audio/wav"
+    ) -> Dict[str, Any]:
         """
         Transcribe audio using Deepgram's Nova-3 model with Audio Intelligence features.
+        Accepts raw bytes or a file path; paths are streamed from disk in chunks
+        so the whole clip never has to sit in memory.
         Returns parsed structured response with transcription and billing data.
         """
         start_time = time.time()
         logger.info("Transcription started")
         
         try:
-            params = {
-                "model": "nova-3",
-                "smart_format": "true",
-                "punctuate": "true",
-                "paragraphs": "true",
-                "utterances": "true",
-                "sentiment": "true",
-                "intents": "true",
-                "topics": "true",
-                "summarize": "v2",
-                "detect_entities": "true",
-            }
+            response = await self._client.post(
+                self.listen_url,
+                headers={"Content-Type": mimetype},
+                content=audio if isinstance(audio, bytes) else _iter_file(audio),
+            )
+            response.raise_for_status()
 
-            headers = {
-                "Authorization": f"Token {self.api_key}",
-                "Content-Type": mimetype,
-            }
-
-            async with httpx.AsyncClient(timeout=120.0) as client:
-                response = await client.post(
-                    self.base_url,
-                    params=params,
-                    headers=headers,
-                    content=audio_buffer,
-                )
-                response.raise_for_status()
-                
-                raw_response = json.loads(response.text)
-                result = parse_deepgram_response(raw_response, start_time)
-                logger.info("Transcription completed successfully")
-                return result
+            # Decoding and parsing large responses is CPU-bound; keep it off the event loop
+            result = await asyncio.to_thread(self._parse_response, response.content, start_time)
+            logger.info("Transcription completed successfully")
+            return result
                 
         except Exception as e:
             logger.error("Deepgram transcription failed")
@@ -1,6 +1,6 @@
 import os
 import logging
-from groq import Groq
+from groq import AsyncGroq
 
 logger = logging.getLogger(__name__)
 
@@ -10,14 +10,15 @@ class GroqLLMService:
         self.api_key = os.getenv("GROQ_API_KEY")
         if not self.api_key:
             raise ValueError("GROQ_API_KEY environment variable not set")
-        self.client = Groq(api_key=self.api_key)
+        # Async client created once and reused, so keep-alive connections persist
+        self.client = AsyncGroq(api_key=self.api_key)
         logger.info("Groq LLM service initialized")
 
     async def generate_response(self, message: str, model: str = "llama-3.3-70b-versatile") -> str:
         """Generate a response using Groq's LLM."""
         logger.info("LLM response generation started")
         try:
-            chat_completion = self.client.chat.completions.create(
+            chat_completion = await self.client.chat.completions.create(
                 messages=[
                     {
                         "role": "user",
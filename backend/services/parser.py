@@ -5,11 +5,55 @@ Parses raw Deepgram API responses into a clean, structured format
 with transcription data, billing information, and proper error handling.
 """
 
-from typing import Any, Dict, List, Optional
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime, timezone
 import time
 
 
+class _Record:
+    """Base for parsed records; convert to plain dicts only at the serialization boundary."""
+    __slots__ = ()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+# Field names match the camelCase keys of the serialized response
+@dataclass(slots=True, frozen=True)
+class Statistics(_Record):
+    totalWords: int
+    duration: float
+    averageConfidence: float
+
+
+@dataclass(slots=True, frozen=True)
+class Paragraph(_Record):
+    text: str
+    startTime: float
+    endTime: float
+    sentiment: str
+    sentimentScore: float
+
+
+@dataclass(slots=True, frozen=True)
+class Utterance(_Record):
+    text: str
+    startTime: float
+    endTime: float
+    confidence: float
+    sentiment: str
+    sentimentScore: float
+
+
+@dataclass(slots=True, frozen=True)
+class EntityRef(_Record):
+    type: str
+    value: str
+    confidence: float
+    timestamp: float
+
+
 def parse_deepgram_response(response: Dict[str, Any], start_time: Optional[float] = None) -> Dict[str, Any]:
     """
     Parse Deepgram API response into structured transcription and billing data.
@@ -19,7 +63,10 @@ def parse_deepgram_response(response: Dict[str, Any], start_time: Optional[float
         start_time: Optional start time for processing time calculation
         
     Returns:
-        Structured dictionary with 'success', 'transcription', 'billing', and 'warnings'
+        Structured dictionary with 'success', 'transcription', 'billing', and 'warnings'.
+        Transcription statistics, paragraphs, utterances and entities are slotted
+        dataclasses; serialize with orjson (a backend requirement, with native
+        dataclass support) or call to_dict() on each record before using stdlib json.
     """
     warnings = []
     
@@ -71,7 +118,7 @@ def _parse_transcription(response: Dict[str, Any], warnings: List[str]) -> Dict[
     }
 
 
-def _calculate_statistics(words: List[Dict], response: Dict[str, Any]) -> Dict[str, Any]:
+def _calculate_statistics(words: List[Dict], response: Dict[str, Any]) -> Statistics:
     """Calculate transcription statistics."""
     duration = response.get("metadata", {}).get("duration", 0)
     
@@ -79,17 +126,16 @@ def _calculate_statistics(words: List[Dict], response: Dict[str, Any]) -> Dict[s
     avg_confidence = 0
     
     if words:
-        confidences = [w.get("confidence", 0) for w in words]
-        avg_confidence = sum(confidences) / len(confidences)
+        avg_confidence = sum(w.get("confidence", 0) for w in words) / total_words
     
-    return {
-        "totalWords": total_words,
-        "duration": round(duration, 2),
-        "averageConfidence": round(avg_confidence, 3)
-    }
+    return Statistics(
+        totalWords=total_words,
+        duration=round(duration, 2),
+        averageConfidence=round(avg_confidence, 3)
+    )
 
 
-def _parse_paragraphs(alternative: Dict[str, Any], results: Dict[str, Any]) -> List[Dict[str, Any]]:
+def _parse_paragraphs(alternative: Dict[str, Any], results: Dict[str, Any]) -> List[Paragraph]:
     """Extract paragraphs with sentiment data."""
     paragraphs_data = alternative.get("paragraphs", {})
     paragraphs_list = paragraphs_data.get("paragraphs", [])
@@ -102,67 +148,68 @@ def _parse_paragraphs(alternative: Dict[str, Any], results: Dict[str, Any]) -> L
             
         # Combine sentence texts
         text = " ".join(s.get("text", "") for s in sentences)
-        start_time = sentences[0].get("start", 0) if sentences else 0
-        end_time = sentences[-1].get("end", 0) if sentences else 0
+        start_time = sentences[0].get("start", 0)
+        end_time = sentences[-1].get("end", 0)
         
         # Get sentiment directly from paragraph object
         sentiment = para.get("sentiment", "neutral")
         sentiment_score = para.get("sentiment_score", 0)
         
-        parsed.append({
-            "text": text,
-            "startTime": round(start_time, 2),
-            "endTime": round(end_time, 2),
-            "sentiment": sentiment,
-            "sentimentScore": round(sentiment_score, 3)
-        })
+        parsed.append(Paragraph(
+            text=text,
+            startTime=round(start_time, 2),
+            endTime=round(end_time, 2),
+            sentiment=sentiment,
+            sentimentScore=round(sentiment_score, 3)
+        ))
     
     return parsed
 
 
 
-def _parse_utterances(results: Dict[str, Any]) -> List[Dict[str, Any]]:
+def _parse_utterances(results: Dict[str, Any]) -> List[Utterance]:
     """Extract utterances with sentiment data."""
     utterances = results.get("utterances", [])
     
-    parsed = []
-    for utt in utterances:
-        # Get sentiment directly from utterance object
-        sentiment = utt.get("sentiment", "neutral")
-        sentiment_score = utt.get("sentiment_score", 0)
-        
-        parsed.append({
-            "text": utt.get("transcript", ""),
-            "startTime": round(utt.get("start", 0), 2),
-            "endTime": round(utt.get("end", 0), 2),
-            "confidence": round(utt.get("confidence", 0), 3),
-            "sentiment": sentiment,
-            "sentimentScore": round(sentiment_score, 3)
-        })
-    
-    return parsed
+    # Sentiment comes directly from each utterance object
+    return [
+        Utterance(
+            text=utt.get("transcript", ""),
+            startTime=round(utt.get("start", 0), 2),
+            endTime=round(utt.get("end", 0), 2),
+            confidence=round(utt.get("confidence", 0), 3),
+            sentiment=utt.get("sentiment", "neutral"),
+            sentimentScore=round(utt.get("sentiment_score", 0), 3)
+        )
+        for utt in utterances
+    ]
 
 
+def _segment_bounds(segments: List[Dict]) -> Tuple[List[float], List[float]]:
+    """Extract parallel start/end lists from segments for repeated overlap scans."""
+    return (
+        [seg.get("start", 0) for seg in segments],
+        [seg.get("end", 0) for seg in segments],
+    )
 
-def _find_sentiment_for_time(segments: List[Dict], start: float, end: float) -> Dict[str, Any]:
-    """Find sentiment segment that best overlaps with given time range."""
-    best_match = None
-    best_overlap = 0
+
+def _find_sentiment_for_time(
+    segments: List[Dict],
+    start: float,
+    end: float,
+    bounds: Optional[Tuple[List[float], List[float]]] = None,
+) -> Dict[str, Any]:
+    """
+    Find sentiment segment that best overlaps with given time range.
     
-    for seg in segments:
-        seg_start = seg.get("start", 0)
-        seg_end = seg.get("end", 0)
-        
-        # Calculate overlap
-        overlap_start = max(start, seg_start)
-        overlap_end = min(end, seg_end)
-        overlap = max(0, overlap_end - overlap_start)
-        
-        if overlap > best_overlap:
-            best_overlap = overlap
-            best_match = seg
+    Pass bounds from _segment_bounds when querying the same segments repeatedly,
+    so the start/end values are extracted once instead of per query.
+    """
+    seg_starts, seg_ends = bounds if bounds is not None else _segment_bounds(segments)
+    idx = _best_overlap_idx(seg_starts, seg_ends, start, end)
     
-    if best_match:
+    if idx >= 0:
+        best_match = segments[idx]
         return {
             "sentiment": best_match.get("sentiment", "neutral"),
             "sentiment_score": best_match.get("sentiment_score", 0)
@@ -171,6 +218,21 @@ def _find_sentiment_for_time(segments: List[Dict], start: float, end: float) ->
     return {"sentiment": "neutral", "sentiment_score": 0}
 
 
+def _best_overlap_idx(seg_starts: List[float], seg_ends: List[float], start: float, end: float) -> int:
+    """Return index of the segment with the largest positive overlap, or -1 if none overlap."""
+    best_idx = -1
+    best_overlap = 0
+    
+    for i, (seg_start, seg_end) in enumerate(zip(seg_starts, seg_ends)):
+        # Negative overlap (disjoint ranges) never beats the zero baseline
+        overlap = min(end, seg_end) - max(start, seg_start)
+        if overlap > best_overlap:
+            best_overlap = overlap
+            best_idx = i
+    
+    return best_idx
+
+
 def _parse_overall_sentiment(results: Dict[str, Any]) -> Dict[str, Any]:
     """Extract overall sentiment from results."""
     sentiments = results.get("sentiments", {})
@@ -182,7 +244,7 @@ def _parse_overall_sentiment(results: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
-def _parse_entities(alternative: Dict[str, Any]) -> List[Dict[str, Any]]:
+def _parse_entities(alternative: Dict[str, Any]) -> List[EntityRef]:
     """Extract detected entities."""
     entities = alternative.get("entities", [])
     words = alternative.get("words", [])
@@ -196,12 +258,12 @@ def _parse_entities(alternative: Dict[str, Any]) -> List[Dict[str, Any]]:
             if word_index is not None and word_index < len(words):
                 timestamp = words[word_index].get("start", 0)
         
-        parsed.append({
-            "type": entity.get("label", "UNKNOWN"),
-            "value": entity.get("value", ""),
-            "confidence": round(entity.get("confidence", 0), 4),
-            "timestamp": round(timestamp, 2)
-        })
+        parsed.append(EntityRef(
+            type=entity.get("label", "UNKNOWN"),
+            value=entity.get("value", ""),
+            confidence=round(entity.get("confidence", 0), 4),
+            timestamp=round(timestamp, 2)
+        ))
     
     return parsed
 
@@ -211,15 +273,13 @@ def _parse_intents(results: Dict[str, Any]) -> List[str]:
     intents_data = results.get("intents", {})
     segments = intents_data.get("segments", [])
     
-    intent_descriptions = []
-    for seg in segments:
-        intents = seg.get("intents", [])
-        for intent in intents:
-            desc = intent.get("intent", "")
-            if desc and desc not in intent_descriptions:
-                intent_descriptions.append(desc)
-    
-    return intent_descriptions
+    # dict.fromkeys de-duplicates in linear time while keeping first-seen order
+    return list(dict.fromkeys(
+        desc
+        for seg in segments
+        for intent in seg.get("intents", [])
+        if (desc := intent.get("intent", ""))
+    ))
 
 
 def _parse_topics(results: Dict[str, Any]) -> List[Dict[str, Any]]:
@@ -227,21 +287,16 @@ def _parse_topics(results: Dict[str, Any]) -> List[Dict[str, Any]]:
     topics_data = results.get("topics", {})
     segments = topics_data.get("segments", [])
     
-    parsed = []
-    for seg in segments:
-        text = seg.get("text", "")
-        topics = seg.get("topics", [])
-        
-        for topic in topics:
-            # Note: Deepgram uses 'confidence_score' not 'confidence'
-            confidence = topic.get("confidence_score", topic.get("confidence", 0))
-            parsed.append({
-                "topic": topic.get("topic", ""),
-                "confidence": round(confidence, 3),
-                "text": text
-            })
-    
-    return parsed
+    # Note: Deepgram uses 'confidence_score' not 'confidence'
+    return [
+        {
+            "topic": topic.get("topic", ""),
+            "confidence": round(topic.get("confidence_score", topic.get("confidence", 0)), 3),
+            "text": seg.get("text", "")
+        }
+        for seg in segments
+        for topic in seg.get("topics", [])
+    ]
 
 
 def _format_word_timestamps_optimized(words: List[Dict[str, Any]]) -> Dict[str, Any]:
@@ -256,37 +311,31 @@ def _format_word_timestamps_optimized(words: List[Dict[str, Any]]) -> Dict[str,
             "full": ""
         }
     
-    # Build full string
-    formatted = []
-    for word in words:
-        w = word.get("word", "").lower()
-        start = round(word.get("start", 0), 1)
-        end = round(word.get("end", 0), 1)
-        formatted.append(f"{w}({start}-{end})")
-    
-    full_string = ", ".join(formatted)
-    
-    first_word = words[0]
-    last_word = words[-1]
+    # Build full string in one comprehension feeding a single join
+    full_string = ", ".join([
+        f"{w.get('word', '').lower()}({round(w.get('start', 0), 1)}-{round(w.get('end', 0), 1)})"
+        for w in words
+    ])
     
     return {
         "summary": {
             "totalWords": len(words),
-            "firstWord": {
-                "word": first_word.get("word", ""),
-                "start": round(first_word.get("start", 0), 2),
-                "end": round(first_word.get("end", 0), 2)
-            },
-            "lastWord": {
-                "word": last_word.get("word", ""),
-                "start": round(last_word.get("start", 0), 2),
-                "end": round(last_word.get("end", 0), 2)
-            }
+            "firstWord": _word_summary(words[0]),
+            "lastWord": _word_summary(words[-1])
         },
         "full": full_string
     }
 
 
+def _word_summary(word: Dict[str, Any]) -> Dict[str, Any]:
+    """Summarize a single word with its rounded timestamps."""
+    return {
+        "word": word.get("word", ""),
+        "start": round(word.get("start", 0), 2),
+        "end": round(word.get("end", 0), 2)
+    }
+
+
 def _parse_billing(response: Dict[str, Any], start_time: Optional[float] = None) -> Dict[str, Any]:
     """Extract billing and metadata information."""
     metadata = response.get("metadata", {})
@@ -1,10 +1,12 @@
+import heapq
+import math
 import os
-import queue
 import tempfile
 import threading
 import time
+from collections import deque
 from pathlib import Path
-from typing import List, Optional
+from typing import Callable, Deque, List, Optional
 
 import numpy as np
 import sounddevice as sd
@@ -16,14 +18,14 @@ from .llm_client import GroqLLM, GroqRateLimitError
 class RecordingSegment(threading.Thread):
     def __init__(
         self,
-        amplitude_queue: "queue.Queue[float]",
+        on_amplitude: Callable[[float], None],
         stop_event: threading.Event,
         max_duration: float = 15.0,
         sample_rate: int = 16000,
         block_size: int = 1024,
     ) -> None:
         super().__init__(daemon=True)
-        self.amplitude_queue = amplitude_queue
+        self.on_amplitude = on_amplitude
         self.stop_event = stop_event
         self.max_duration = max_duration
         self.sample_rate = sample_rate
@@ -32,35 +34,47 @@ class RecordingSegment(threading.Thread):
         self._started_at: float = time.time()
 
     def run(self) -> None:
-        frames: List[np.ndarray] = []
+        fd, temp_path = tempfile.mkstemp(prefix="seg_", suffix=".flac")
+        os.close(fd)
+        path = Path(temp_path)
+        frames_written = 0
         start = time.time()
         try:
-            with sd.InputStream(
+            # Write each block to disk as it arrives instead of buffering the whole segment.
+            # FLAC is lossless and roughly half the size of WAV, so uploads are smaller.
+            with sf.SoundFile(
+                path,
+                mode="w",
+                samplerate=self.sample_rate,
+                channels=1,
+                format="FLAC",
+                subtype="PCM_16",
+            ) as wf, sd.InputStream(
                 samplerate=self.sample_rate,
                 channels=1,
                 dtype="float32",
                 blocksize=self.block_size,
             ) as stream:
                 while not self.stop_event.is_set():
+                    # stream.read() allocates a fresh array per call, so no copy is needed
                     chunk, _ = stream.read(self.block_size)
-                    frames.append(chunk.copy())
-                    rms = float(np.sqrt(np.mean(np.square(chunk))))
+                    wf.write(chunk)
+                    frames_written += len(chunk)
+                    samples = chunk[:, 0]
+                    rms = math.sqrt(float(np.dot(samples, samples)) / samples.size)
                     # Normalize to [0,1] range for UI; guard division by zero
                     level = min(rms * 10.0, 1.0)
-                    self.amplitude_queue.put(level)
+                    self.on_amplitude(level)
                     if time.time() - start >= self.max_duration:
                         break
         except Exception:
+            path.unlink(missing_ok=True)
             return
 
-        if not frames:
+        if not frames_written:
+            path.unlink(missing_ok=True)
             return
-        data = np.concatenate(frames, axis=0)
-        fd, temp_path = tempfile.mkstemp(prefix="seg_", suffix=".wav")
-        os.close(fd)
-        Path(temp_path).unlink(missing_ok=True)  # soundfile will recreate
-        self.file_path = Path(temp_path)
-        sf.write(self.file_path, data, self.sample_rate)
+        self.file_path = path
 
 
 class OverlapAudioManager:
@@ -75,14 +89,14 @@ class OverlapAudioManager:
         self,
         llm: GroqLLM,
         transcript_path: Path,
-        amplitude_queue: "queue.Queue[float]",
+        on_amplitude: Callable[[float], None],
         segment_gap: float = 12.0,
         segment_duration: float = 15.0,
         max_retries: int = 3,
     ) -> None:
         self.llm = llm
         self.transcript_path = transcript_path
-        self.amplitude_queue = amplitude_queue
+        self.on_amplitude = on_amplitude
         self.segment_gap = segment_gap
         self.segment_duration = segment_duration
         self.max_retries = max_retries
@@ -91,9 +105,15 @@ class OverlapAudioManager:
         self._active: List[RecordingSegment] = []
         self._lock = threading.Lock()
         self._paused = False
-        self._pending_queue: queue.PriorityQueue[tuple[float, Optional[Path]]] = queue.PriorityQueue()
+        # Finished segments awaiting transcription; deque append/popleft are thread-safe
+        self._pending: Deque[tuple[float, Path]] = deque()
+        self._pending_evt = threading.Event()
+        self._shutdown_evt = threading.Event()
+        # Min-heap of (start_ts, text); the transcript file mirrors it in start order
         self._results: List[tuple[float, str]] = []
         self._results_lock = threading.Lock()
+        self._last_written_ts: Optional[float] = None
+        self._transcript_dir_ready = False
         self._transcriber_thread: threading.Thread | None = None
 
     @property
@@ -109,15 +129,11 @@ class OverlapAudioManager:
         self.clear_transcript()
         with self._results_lock:
             self._results.clear()
+            self._last_written_ts = None
         # Clear pending queue
-        while not self._pending_queue.empty():
-            try:
-                self._pending_queue.get_nowait()
-            except queue.Empty:
-                break
+        self._pending.clear()
         # Start transcriber thread
-        self._transcriber_thread = threading.Thread(target=self._transcriber_loop, daemon=True)
-        self._transcriber_thread.start()
+        self._start_transcriber()
         # Start scheduler
         self._scheduler = threading.Thread(target=self._schedule, daemon=True)
         self._scheduler.start()
@@ -131,8 +147,7 @@ class OverlapAudioManager:
         self._stop_all = threading.Event()
         # Restart transcriber if needed
         if self._transcriber_thread is None or not self._transcriber_thread.is_alive():
-            self._transcriber_thread = threading.Thread(target=self._transcriber_loop, daemon=True)
-            self._transcriber_thread.start()
+            self._start_transcriber()
         self._scheduler = threading.Thread(target=self._schedule, daemon=True)
         self._scheduler.start()
 
@@ -141,7 +156,7 @@ class OverlapAudioManager:
         while not self._stop_all.is_set():
             stop_evt = threading.Event()
             segment = RecordingSegment(
-                amplitude_queue=self.amplitude_queue,
+                on_amplitude=self.on_amplitude,
                 stop_event=stop_evt,
                 max_duration=self.segment_duration,
             )
@@ -168,35 +183,64 @@ class OverlapAudioManager:
             if segment in self._active:
                 self._active.remove(segment)
                 if segment.file_path and segment.file_path.exists():
-                    self._pending_queue.put((segment._started_at, segment.file_path))
+                    self._enqueue(segment._started_at, segment.file_path)
 
-    def _transcriber_loop(self) -> None:
-        """Process transcription queue as segments arrive."""
+    def _start_transcriber(self) -> None:
+        self._shutdown_evt = threading.Event()
+        self._transcriber_thread = threading.Thread(
+            target=self._transcriber_loop,
+            args=(self._shutdown_evt,),
+            daemon=True,
+        )
+        self._transcriber_thread.start()
+
+    def _enqueue(self, start_ts: float, path: Path) -> None:
+        self._pending.append((start_ts, path))
+        self._pending_evt.set()
+
+    def _signal_transcriber_shutdown(self) -> None:
+        self._shutdown_evt.set()
+        self._pending_evt.set()
+
+    def _transcriber_loop(self, shutdown_evt: threading.Event) -> None:
+        """Process transcription queue as segments arrive; exit once drained after shutdown."""
         while True:
-            try:
-                start_ts, path = self._pending_queue.get(timeout=0.5)
-            except queue.Empty:
-                continue
-            
-            if path is None:
+            self._pending_evt.wait()
+            self._pending_evt.clear()
+            while self._pending:
+                try:
+                    start_ts, path = self._pending.popleft()
+                except IndexError:
+                    # cancel() drained the queue concurrently
+                    break
+                text = self._transcribe_single(path)
+                if text:
+                    self._write_transcript(start_ts, text.strip())
+                path.unlink(missing_ok=True)
+            if shutdown_evt.is_set() and not self._pending:
                 break
 
-            text = self._transcribe_single(path)
-            if text:
-                with self._results_lock:
-                    self._results.append((start_ts, text.strip()))
-                self._write_transcript()
-            path.unlink(missing_ok=True)
+    def _write_transcript(self, start_ts: float, text: str) -> None:
+        """Record a result and update the transcript file, sorted by start time.
 
-    def _write_transcript(self) -> None:
-        """Write all results to transcript file, sorted by start time."""
+        Segments normally finish in start order, so the new text is appended to
+        the file. A late arrival (older than what is already written) falls back
+        to rewriting the whole transcript.
+        """
         with self._results_lock:
-            sorted_results = sorted(self._results, key=lambda x: x[0])
-            texts = [text for _, text in sorted_results]
-        if texts:
-            self.transcript_path.parent.mkdir(parents=True, exist_ok=True)
-            with open(self.transcript_path, "w", encoding="utf-8") as fh:
-                fh.write(" ".join(texts))
+            heapq.heappush(self._results, (start_ts, text))
+            if not self._transcript_dir_ready:
+                self.transcript_path.parent.mkdir(parents=True, exist_ok=True)
+                self._transcript_dir_ready = True
+            if self._last_written_ts is None or start_ts >= self._last_written_ts:
+                prefix = "" if self._last_written_ts is None else " "
+                with open(self.transcript_path, "a", encoding="utf-8") as fh:
+                    fh.write(prefix + text)
+                self._last_written_ts = start_ts
+            else:
+                texts = [t for _, t in sorted(self._results)]
+                with open(self.transcript_path, "w", encoding="utf-8") as fh:
+                    fh.write(" ".join(texts))
 
     def _stop_active_segments(self) -> None:
         """Stop active segments and queue their audio for transcription."""
@@ -206,7 +250,7 @@ class OverlapAudioManager:
             seg.stop_event.set()
             seg.join(timeout=3)
             if seg.file_path and seg.file_path.exists():
-                self._pending_queue.put((seg._started_at, seg.file_path))
+                self._enqueue(seg._started_at, seg.file_path)
 
     def _shutdown(self, paused: bool = False) -> None:
         """Internal: stop threads and wait for transcription."""
@@ -216,8 +260,8 @@ class OverlapAudioManager:
             self._scheduler.join(timeout=2)
         self._stop_active_segments()
         
-        # Signal transcriber to stop
-        self._pending_queue.put((float('inf'), None))
+        # Signal transcriber to stop once pending segments are done
+        self._signal_transcriber_shutdown()
         
         if self._transcriber_thread:
             self._transcriber_thread.join(timeout=30)
@@ -245,16 +289,15 @@ class OverlapAudioManager:
             if seg.file_path and seg.file_path.exists():
                 seg.file_path.unlink(missing_ok=True)
         # Clear pending queue
-        while not self._pending_queue.empty():
+        while self._pending:
             try:
-                _, path = self._pending_queue.get_nowait()
-                if path:
-                    path.unlink(missing_ok=True)
-            except queue.Empty:
+                _, path = self._pending.popleft()
+            except IndexError:
                 break
+            path.unlink(missing_ok=True)
         
         # Signal transcriber to stop
-        self._pending_queue.put((float('inf'), None))
+        self._signal_transcriber_shutdown()
         
         # Stop transcriber
         if self._transcriber_thread:
@@ -262,6 +305,7 @@ class OverlapAudioManager:
             self._transcriber_thread = None
         with self._results_lock:
             self._results.clear()
+            self._last_written_ts = None
         self.clear_transcript()
         self._paused = False
 
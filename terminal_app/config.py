@@ -1,5 +1,6 @@
 import json
 import sys
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Dict
 
@@ -14,7 +15,9 @@ DEFAULT_CONFIG: Dict[str, Any] = {
 }
 
 
+@lru_cache(maxsize=1)
 def load_config() -> Dict[str, Any]:
+    """Load config.json merged over defaults. Cached; use reload_config() to re-read."""
     # Determine where to look for config.json
     if getattr(sys, 'frozen', False):
         # If running as compiled exe, look in the same folder as the exe
@@ -50,3 +53,9 @@ def load_config() -> Dict[str, Any]:
         merged.update(user_cfg["hotkeys"])
         cfg["hotkeys"] = merged
     return cfg
+
+
+def reload_config() -> Dict[str, Any]:
+    """Drop the cached config and read config.json from disk again."""
+    load_config.cache_clear()
+    return load_config()
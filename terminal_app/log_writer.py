@@ -0,0 +1,66 @@
+import logging
+import queue
+import threading
+from pathlib import Path
+from typing import Optional, TextIO
+
+
+class LogWriter:
+    """Append text to a file from a background thread so callers never wait on disk I/O."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._queue: "queue.SimpleQueue[Optional[str]]" = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def write(self, text: str) -> None:
+        self._queue.put(text)
+
+    def close(self, timeout: float = 2.0) -> None:
+        """Write out anything still queued and stop the writer thread."""
+        self._queue.put(None)
+        self._thread.join(timeout=timeout)
+
+    def _open(self) -> Optional[TextIO]:
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            return open(self.path, "a", encoding="utf-8")
+        except OSError as exc:
+            logging.error(f"Cannot open {self.path}: {exc}")
+            return None
+
+    def _run(self) -> None:
+        # File stays open for the writer's lifetime; after an I/O error it is reopened on the
+        # next batch, so one failure never leaves the queue undrained
+        fh = self._open()
+        while True:
+            item = self._queue.get()
+            # Batch entries that are already waiting into a single flush
+            batch = []
+            while item is not None:
+                batch.append(item)
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                if fh is None:
+                    fh = self._open()
+                if fh is None:
+                    logging.error(f"Dropped {len(batch)} entries for {self.path}")
+                else:
+                    try:
+                        fh.write("".join(batch))
+                        fh.flush()
+                    except OSError as exc:
+                        logging.error(f"Write to {self.path} failed: {exc}")
+                        try:
+                            fh.close()
+                        except OSError:
+                            pass
+                        fh = None
+            if item is None:
+                break
+        if fh is not None:
+            fh.close()
@@ -1,8 +1,11 @@
 import queue
 import sys
+import threading
 import time
 import logging
+from functools import partial
 from pathlib import Path
+from typing import Callable
 
 import keyboard
 from dotenv import load_dotenv
@@ -14,13 +17,15 @@ if __package__ in (None, ""):
     from terminal_app.config import load_config
     from terminal_app.inserter import safe_insert
     from terminal_app.llm_client import GroqLLM, GroqRateLimitError
-    from terminal_app.ui import WaveformWindow
+    from terminal_app.log_writer import LogWriter
+    from terminal_app.ui import UiState, WaveformWindow
 else:
     from .audio import OverlapAudioManager
     from .config import load_config
     from .inserter import safe_insert
     from .llm_client import GroqLLM, GroqRateLimitError
-    from .ui import WaveformWindow
+    from .log_writer import LogWriter
+    from .ui import UiState, WaveformWindow
 
 
 def setup_logging():
@@ -76,9 +81,8 @@ def main() -> None:
         hk_prompt = cfg.get("hotkeys", {}).get("prompt", "ctrl+shift+alt+p")
         max_retries = 3
 
-        amplitude_queue: queue.Queue[float] = queue.Queue()
         transcript_path = Path(__file__).parent / "transcripts.log"
-        formatted_log_path = Path(__file__).parent / "formatted.log"
+        formatted_log = LogWriter(Path(__file__).parent / "formatted.log")
 
         try:
             llm = GroqLLM()
@@ -86,15 +90,13 @@ def main() -> None:
             logging.error(f"Groq init failed: {exc}")
             sys.exit(1)
 
+        visual = WaveformWindow()
         recorder = OverlapAudioManager(
             llm=llm,
             transcript_path=transcript_path,
-            amplitude_queue=amplitude_queue,
+            on_amplitude=visual.emit_amplitude,
             max_retries=max_retries,
         )
-        visual = WaveformWindow(
-            amplitude_queue,
-        )
 
         status = {"recording": False, "paused": False, "last_formatted": "", "mode": "transcribe"}
 
@@ -102,7 +104,9 @@ def main() -> None:
             if status["recording"] and status["paused"]:
                 recorder.resume()
                 status["paused"] = False
-                visual.update_status("recording" + (" prompt" if status["mode"] == "prompt" else ""))
+                visual.update_status(
+                    UiState.RECORDING_PROMPT if status["mode"] == "prompt" else UiState.RECORDING_TRANSCRIBE
+                )
                 logging.info("Resumed recording")
                 return
             if status["recording"]:
@@ -110,8 +114,9 @@ def main() -> None:
                 return
             status["mode"] = mode
             # start() clears old files and transcript automatically
-            label = "recording" if mode == "transcribe" else "recording prompt"
-            visual.update_status(label)
+            visual.update_status(
+                UiState.RECORDING_TRANSCRIBE if mode == "transcribe" else UiState.RECORDING_PROMPT
+            )
             recorder.start()
             status["recording"] = True
             status["paused"] = False
@@ -126,7 +131,7 @@ def main() -> None:
                 return
             recorder.pause()
             status["paused"] = True
-            visual.update_status("paused")
+            visual.update_status(UiState.PAUSED)
             logging.info("Recording paused")
 
         def stop_and_process() -> None:
@@ -134,7 +139,7 @@ def main() -> None:
                 logging.info("Not recording; ignoring stop")
                 return
             logging.info("Stopping and processing...")
-            visual.update_status("processing")
+            visual.update_status(UiState.PROCESSING)
             # stop() transcribes all audio sequentially, then returns
             recorder.stop()
             status["recording"] = False
@@ -143,7 +148,7 @@ def main() -> None:
             raw_text = recorder.read_transcript().strip()
             if not raw_text:
                 logging.info("No transcript captured")
-                visual.update_status("idle")
+                visual.update_status(UiState.IDLE)
                 status["mode"] = "transcribe"
                 return
             try:
@@ -152,11 +157,10 @@ def main() -> None:
                 else:
                     formatted = llm.format_text(raw_text)
                 status["last_formatted"] = formatted
-                with open(formatted_log_path, "a", encoding="utf-8") as fh:
-                    fh.write(formatted + "\n\n")
+                formatted_log.write(formatted + "\n\n")
             except GroqRateLimitError:
                 logging.warning("All Groq keys are cooling down (rate limited). Please wait ~5 minutes and try again.")
-                visual.update_status("idle")
+                visual.update_status(UiState.IDLE)
                 status["mode"] = "transcribe"
                 return
             except Exception as exc:
@@ -165,7 +169,7 @@ def main() -> None:
                     logging.error("Network error: please check your connection and try again.")
                 else:
                     logging.error(f"LLM formatting failed: {exc}")
-                visual.update_status("idle")
+                visual.update_status(UiState.IDLE)
                 status["mode"] = "transcribe"
                 return
             error = safe_insert(formatted)
@@ -173,7 +177,7 @@ def main() -> None:
                 logging.error(f"Insert failed: {error}")
             else:
                 logging.info("Formatted text inserted at cursor")
-            visual.update_status("idle")
+            visual.update_status(UiState.IDLE)
             status["mode"] = "transcribe"
 
         def cancel_all() -> None:
@@ -184,23 +188,38 @@ def main() -> None:
             status["recording"] = False
             status["paused"] = False
             status["mode"] = "transcribe"
-            visual.update_status("idle")
+            visual.update_status(UiState.IDLE)
             logging.info("Recording and pending transcriptions cancelled; transcript cleared.")
 
-        keyboard.add_hotkey(hk_start, start_recording)
-        keyboard.add_hotkey(hk_stop, stop_and_process)
-        keyboard.add_hotkey(hk_pause, pause_recording)
-        keyboard.add_hotkey(hk_cancel, cancel_all)
-        keyboard.add_hotkey(hk_prompt, lambda: start_recording("prompt"))
+        # Hotkey hooks only enqueue; one dispatcher thread runs the handlers in order.
+        # Handlers block on recording/LLM I/O, so they stay off both the hook and Qt threads.
+        actions: "queue.SimpleQueue[Callable[[], None]]" = queue.SimpleQueue()
+
+        def dispatch_actions() -> None:
+            while True:
+                action = actions.get()
+                try:
+                    action()
+                except Exception as exc:
+                    logging.error(f"Hotkey action failed: {exc}", exc_info=True)
+
+        threading.Thread(target=dispatch_actions, daemon=True).start()
+
+        keyboard.add_hotkey(hk_start, actions.put, args=(start_recording,))
+        keyboard.add_hotkey(hk_stop, actions.put, args=(stop_and_process,))
+        keyboard.add_hotkey(hk_pause, actions.put, args=(pause_recording,))
+        keyboard.add_hotkey(hk_cancel, actions.put, args=(cancel_all,))
+        keyboard.add_hotkey(hk_prompt, actions.put, args=(partial(start_recording, "prompt"),))
 
+        # UI buttons go through the same queue, so `status` is only ever touched by the dispatcher
         visual.callbacks.update(
             {
-                "start": start_recording,
-                "pause": pause_recording,
-                "resume": start_recording,
-                "stop": stop_and_process,
-                "cancel": cancel_all,
-                "prompt": lambda: start_recording("prompt"),
+                "start": partial(actions.put, start_recording),
+                "pause": partial(actions.put, pause_recording),
+                "resume": partial(actions.put, start_recording),
+                "stop": partial(actions.put, stop_and_process),
+                "cancel": partial(actions.put, cancel_all),
+                "prompt": partial(actions.put, partial(start_recording, "prompt")),
             }
         )
 
@@ -220,6 +239,10 @@ def main() -> None:
             recorder.stop()
         except UnboundLocalError:
             pass
+        try:
+            formatted_log.close()
+        except UnboundLocalError:
+            pass
 
 
 if __name__ == "__main__":
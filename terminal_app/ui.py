@@ -1,6 +1,5 @@
 import sys
 import threading
-import queue
 import winsound
 import signal
 import time
@@ -8,6 +7,8 @@ import struct
 import math
 import os
 import tempfile
+from collections import deque
+from enum import IntEnum
 from typing import Callable, Dict, Optional
 
 from PyQt6.QtWidgets import (QApplication, QWidget, QHBoxLayout, 
@@ -15,8 +16,15 @@ from PyQt6.QtWidgets import (QApplication, QWidget, QHBoxLayout,
 from PyQt6.QtCore import Qt, QTimer, pyqtSignal, QObject, QPoint
 from PyQt6.QtGui import QColor, QPainter, QBrush, QCursor
 
+class UiState(IntEnum):
+    IDLE = 0
+    RECORDING_TRANSCRIBE = 1
+    RECORDING_PROMPT = 2
+    PAUSED = 3
+    PROCESSING = 4
+
 class Communicator(QObject):
-    status_signal = pyqtSignal(str)
+    status_signal = pyqtSignal(int)
     amplitude_signal = pyqtSignal(float)
 
 class SoundEngine:
@@ -70,90 +78,113 @@ class SoundEngine:
             flags = winsound.SND_FILENAME | winsound.SND_ASYNC | winsound.SND_NODEFAULT
             winsound.PlaySound(self.sounds[name], flags)
 
+BUTTON_STYLE_TEMPLATE = """
+    QPushButton {{
+        background-color: {color};
+        color: white;
+        border-radius: {radius}px;
+        font-size: {font_size}px;
+        border: none;
+        font-family: Segoe UI Symbol;
+    }}
+    QPushButton:hover {{
+        background-color: {hover_color};
+    }}
+    QPushButton:pressed {{
+        background-color: {color};
+    }}
+"""
+
 class ModernButton(QPushButton):
+    # Formatted stylesheets keyed by (color, hover_color, size, font_size)
+    _STYLE_CACHE: Dict[tuple, str] = {}
+
     def __init__(self, text, color, hover_color, callback, size=36, font_size=16):
         super().__init__(text)
         self.setFixedSize(size, size)
         self.setCursor(Qt.CursorShape.PointingHandCursor)
         self.clicked.connect(callback)
-        self.default_color = color
-        self.hover_color = hover_color
-        self.setStyleSheet(f"""
-            QPushButton {{
-                background-color: {color};
-                color: white;
-                border-radius: {size//2}px;
-                font-size: {font_size}px;
-                border: none;
-                font-family: Segoe UI Symbol;
-            }}
-            QPushButton:hover {{
-                background-color: {hover_color};
-            }}
-            QPushButton:pressed {{
-                background-color: {color};
-            }}
-        """)
+        self.font_size = font_size
+        self._current_style = None
+        self.update_color(color, hover_color)
 
     def update_color(self, color, hover_color):
         self.default_color = color
         self.hover_color = hover_color
-        self.setStyleSheet(f"""
-            QPushButton {{
-                background-color: {color};
-                color: white;
-                border-radius: {self.width()//2}px;
-                font-size: 16px;
-                border: none;
-                font-family: Segoe UI Symbol;
-            }}
-            QPushButton:hover {{
-                background-color: {hover_color};
-            }}
-            QPushButton:pressed {{
-                background-color: {color};
-            }}
-        """)
+        key = (color, hover_color, self.width(), self.font_size)
+        style = self._STYLE_CACHE.get(key)
+        if style is None:
+            style = BUTTON_STYLE_TEMPLATE.format(
+                color=color, hover_color=hover_color, radius=self.width() // 2, font_size=self.font_size
+            )
+            self._STYLE_CACHE[key] = style
+        # setStyleSheet re-parses and re-polishes the widget; skip it when nothing changed
+        if style != self._current_style:
+            self._current_style = style
+            self.setStyleSheet(style)
+
+BRUSH_LEVELS = 8
 
 class WaveformWidget(QWidget):
     def __init__(self):
         super().__init__()
         self.setFixedSize(100, 40)
-        self.amplitudes = [0.0] * 30
+        # Ring buffer: appending drops the oldest sample in O(1)
+        self.amplitudes = deque([0.0] * 30, maxlen=30)
         self.mode = "transcribe" # or prompt
+        # Coalesce bursts of samples into at most one repaint per ~33 ms (30 FPS);
+        # single-shot so the timer only runs while samples are arriving
+        self._repaint_timer = QTimer(self)
+        self._repaint_timer.setSingleShot(True)
+        self._repaint_timer.setInterval(33)
+        self._repaint_timer.timeout.connect(self.update)
+        # Geometry is fixed, so bar layout is computed once
+        self._bar_width = self.width() / len(self.amplitudes)
+        self._center_y = self.height() / 2
+        # Pre-built brushes per mode, bucketed into 8 opacity levels by amplitude
+        base_colors = {"transcribe": QColor("#3B82F6"), "prompt": QColor("#A855F7")}
+        self._brushes = {
+            mode: [
+                QBrush(QColor(c.red(), c.green(), c.blue(), int(150 + (i / (BRUSH_LEVELS - 1)) * 105)))
+                for i in range(BRUSH_LEVELS)
+            ]
+            for mode, c in base_colors.items()
+        }
 
     def update_data(self, amp):
-        self.amplitudes.pop(0)
         self.amplitudes.append(amp)
-        self.update()
+        if not self._repaint_timer.isActive():
+            self._repaint_timer.start()
 
     def paintEvent(self, event):
         painter = QPainter(self)
         painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setPen(Qt.PenStyle.NoPen)
         
-        bar_width = self.width() / len(self.amplitudes)
-        center_y = self.height() / 2
+        bar_width = self._bar_width
+        center_y = self._center_y
+        height = self.height()
         
         # Color based on mode
-        base_color = QColor("#3B82F6") if self.mode == "transcribe" else QColor("#A855F7")
+        brushes = self._brushes["transcribe" if self.mode == "transcribe" else "prompt"]
+        top_level = BRUSH_LEVELS - 1
         
         for i, amp in enumerate(self.amplitudes):
             # Calculate height
-            h = max(4, amp * self.height())
+            h = max(4, amp * height)
             x = i * bar_width
             y = center_y - (h / 2)
             
             # Opacity based on amplitude
-            color = QColor(base_color)
-            color.setAlpha(int(150 + min(amp, 1.0) * 105))
-            
-            painter.setBrush(QBrush(color))
-            painter.setPen(Qt.PenStyle.NoPen)
+            painter.setBrush(brushes[min(top_level, int(amp * top_level))])
             
             # Draw rounded rect
             painter.drawRoundedRect(int(x), int(y), int(bar_width - 2), int(h), 2, 2)
 
 class MainWindow(QWidget):
+    # Pill width per mode; height is fixed at 50
+    _WIDTHS = {"idle": 180, "recording": 270}
+
     def __init__(self, callbacks, communicator):
         super().__init__()
         self.callbacks = callbacks
@@ -179,8 +210,9 @@ class MainWindow(QWidget):
             }
         """)
         # Start with idle size
-        self.container.setFixedSize(180, 50)
-        self.setFixedSize(180, 50)
+        self._current_mode = "idle"
+        self.container.setFixedSize(self._WIDTHS["idle"], 50)
+        self.setFixedSize(self._WIDTHS["idle"], 50)
         
         self.container_layout = QHBoxLayout(self.container)
         self.container_layout.setContentsMargins(10, 5, 10, 5)
@@ -228,6 +260,14 @@ class MainWindow(QWidget):
         
         self.stack.addWidget(self.rec_widget)
         
+        self._status_handlers: Dict[UiState, Callable[[], None]] = {
+            UiState.RECORDING_TRANSCRIBE: lambda: self._show_recording("transcribe"),
+            UiState.RECORDING_PROMPT: lambda: self._show_recording("prompt"),
+            UiState.PAUSED: self._show_paused,
+            UiState.PROCESSING: self._show_processing,
+            UiState.IDLE: self._show_idle,
+        }
+        
         # Connect signals
         self.comm.status_signal.connect(self.handle_status)
         self.comm.amplitude_signal.connect(self.waveform.update_data)
@@ -252,22 +292,25 @@ class MainWindow(QWidget):
         self.sound_engine.play(name)
 
     def transition_to(self, mode):
+        mode = "idle" if mode == "idle" else "recording"
+        # Each resize/move invalidates the layout; skip entirely if already there
+        if mode == self._current_mode:
+            return
+        self._current_mode = mode
+        
         current_geometry = self.geometry()
         center_point = current_geometry.center()
+        new_width = self._WIDTHS[mode]
         
-        if mode == "idle":
-            new_width = 180
-            self.stack.setCurrentIndex(0)
-        else:
-            new_width = 270
-            self.stack.setCurrentIndex(1)
-            
+        self.setUpdatesEnabled(False)
+        self.stack.setCurrentIndex(0 if mode == "idle" else 1)
         self.container.setFixedSize(new_width, 50)
         self.setFixedSize(new_width, 50)
         
         # Re-center horizontally, keep vertical position
         new_x = center_point.x() - (new_width // 2)
         self.move(new_x, current_geometry.y())
+        self.setUpdatesEnabled(True)
 
     def on_quit(self):
         self.play_sound('cancel')
@@ -311,44 +354,46 @@ class MainWindow(QWidget):
         self.callbacks.get("cancel", lambda: None)()
         self.transition_to("idle")
 
-    def handle_status(self, text):
-        if "recording" in text:
-            self.play_sound('start')
-            self.transition_to("recording")
-            if "prompt" in text:
-                self.waveform.mode = "prompt"
-            else:
-                self.waveform.mode = "transcribe"
-            self.update_send_button_color()
-            
-            self.is_paused = False
-            self.btn_pause.setText("⏸")
-            self.btn_pause.update_color("#7f8c8d", "#95a5a6")
-            
-        elif "paused" in text:
-            self.play_sound('pause')
-            self.is_paused = True
-            self.btn_pause.setText("▶")
-            self.btn_pause.update_color("#3498db", "#2980b9")
-            
-        elif "processing" in text:
-            self.play_sound('ting_tong')
+    def handle_status(self, state):
+        self._status_handlers[UiState(state)]()
 
-        elif "idle" in text:
-            self.play_sound('stop')
-            self.transition_to("idle")
-            self.is_paused = False
+    def _show_recording(self, mode):
+        self.play_sound('start')
+        self.transition_to("recording")
+        self.waveform.mode = mode
+        self.update_send_button_color()
+        
+        self.is_paused = False
+        self.btn_pause.setText("⏸")
+        self.btn_pause.update_color("#7f8c8d", "#95a5a6")
+
+    def _show_paused(self):
+        self.play_sound('pause')
+        self.is_paused = True
+        self.btn_pause.setText("▶")
+        self.btn_pause.update_color("#3498db", "#2980b9")
+
+    def _show_processing(self):
+        self.play_sound('ting_tong')
+
+    def _show_idle(self):
+        self.play_sound('stop')
+        self.transition_to("idle")
+        self.is_paused = False
 
 class WaveformWindow:
-    def __init__(self, amplitude_queue, callbacks=None):
-        self.queue = amplitude_queue
+    def __init__(self, callbacks=None):
         self.callbacks = callbacks or {}
         self.comm = Communicator()
         self.app = None
         self.window = None
 
-    def update_status(self, text: str) -> None:
-        self.comm.status_signal.emit(text)
+    def update_status(self, state: UiState) -> None:
+        self.comm.status_signal.emit(int(state))
+
+    def emit_amplitude(self, level: float) -> None:
+        # Safe from any thread: cross-thread emits are queued onto the GUI thread
+        self.comm.amplitude_signal.emit(float(level))
 
     def run(self):
         # Create QApplication if it doesn't exist
@@ -367,27 +412,12 @@ class WaveformWindow:
         
         self.window.show()
         
-        # Timer for amplitude processing
-        timer = QTimer()
-        timer.timeout.connect(self._process_queue)
-        timer.start(30) # 30ms update rate
-        
         # Handle Ctrl+C gracefully
         signal.signal(signal.SIGINT, lambda *args: self.app.quit())
         
         # Timer to allow Python to process signals
         ctrl_c_timer = QTimer()
         ctrl_c_timer.timeout.connect(lambda: None)
-        ctrl_c_timer.start(100)
+        ctrl_c_timer.start(200)
         
         self.app.exec()
-
-    def _process_queue(self):
-        try:
-            while not self.queue.empty():
-                amp = self.queue.get_nowait()
-                self.comm.amplitude_signal.emit(float(amp))
-        except:
-            pass
-
-
@@ -17,11 +17,22 @@ class Settings(BaseSettings):
     
     # Service
     TRANSCRIPTION_SERVICE_PORT: int = 8010
+    MAX_IMAGE_UPLOAD_BYTES: int = 3 * 1024 * 1024
     DEEPGRAM_MODEL: str = "nova-3"
     
+    # Local admission limit, applied per Groq model
+    GROQ_RPM_LIMIT: int = 30
+    
     # LLM Models
     GROQ_FORMAT_MODEL: str = "llama-3.3-70b-versatile"
     GROQ_PROMPT_MODEL: str = "meta-llama/llama-4-maverick-17b-128e-instruct"
+    # Models that accept response_format json_schema (comma-separated); others fall back to json_object
+    GROQ_JSON_SCHEMA_MODELS: str = (
+        "meta-llama/llama-4-maverick-17b-128e-instruct,meta-llama/llama-4-scout-17b-16e-instruct,"
+        "moonshotai/kimi-k2-instruct,openai/gpt-oss-20b,openai/gpt-oss-120b"
+    )
+    # Subset where Groq enforces the schema (strict: true); the rest are best-effort
+    GROQ_STRICT_SCHEMA_MODELS: str = "openai/gpt-oss-20b,openai/gpt-oss-120b"
     
     # Pricing (USD per token)
     GROQ_FORMAT_INPUT_COST: float = 0.59 / 1_000_000
@@ -29,6 +40,19 @@ class Settings(BaseSettings):
     GROQ_PROMPT_INPUT_COST: float = 0.20 / 1_000_000
     GROQ_PROMPT_OUTPUT_COST: float = 0.60 / 1_000_000
     
+    # LLM response cache (only near-deterministic calls are cached)
+    LLM_CACHE_SIZE: int = 10_000
+    LLM_CACHE_TTL: float = 3600.0
+    LLM_CACHE_MAX_TEMP: float = 0.1
+    
+    @property
+    def json_schema_models(self) -> frozenset:
+        return frozenset(m.strip() for m in self.GROQ_JSON_SCHEMA_MODELS.split(",") if m.strip())
+    
+    @property
+    def strict_schema_models(self) -> frozenset:
+        return frozenset(m.strip() for m in self.GROQ_STRICT_SCHEMA_MODELS.split(",") if m.strip())
+    
     @property
     def cors_origins_list(self) -> List[str]:
         if self.CORS_ORIGINS == "*":
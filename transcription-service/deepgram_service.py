@@ -1,23 +1,100 @@
 """Deepgram transcription service."""
 
+import asyncio
 import httpx
 import logging
-from typing import Optional, Dict, Any
+import orjson
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from itertools import chain
+from typing import Optional, Dict, Any, Set, Tuple
+from urllib.parse import urlencode
 from config import settings
 from json_utils import RateLimitException
 
 logger = logging.getLogger(__name__)
 
+_EMPTY: Dict[str, Any] = {}
+
+# Query strings depend only on settings, so encode them once instead of per request.
+# Only the analyses transcribe() actually reads back are requested.
+_QS_BASE = urlencode({
+    "model": settings.DEEPGRAM_MODEL,
+    "smart_format": "true", "punctuate": "true", "utterances": "true",
+    "sentiment": "true", "topics": "true",
+})
+_QS_MULTI = f"{_QS_BASE}&detect_language=true"
+_QS_LANG = {lang: f"{_QS_BASE}&{urlencode({'language': lang})}" for lang in ("en", "hi")}
+
+
+def _listen_query(language: str) -> str:
+    if language == "multi":
+        return _QS_MULTI
+    qs = _QS_LANG.get(language)
+    return qs if qs is not None else f"{_QS_BASE}&{urlencode({'language': language})}"
+
+
+@dataclass(slots=True)
+class TranscribeResult:
+    """Transcription outcome with raw numeric billing; formatting is left to the caller."""
+    transcript: str
+    duration: float
+    transcription: Dict[str, Any]
+    cost_usd: Optional[float] = None
+    balance_usd: Optional[float] = None
+    request_id: Optional[str] = None
+
 
 class DeepgramService:
     """Transcription via Deepgram API."""
     
     BASE_URL = "https://api.deepgram.com/v1"
+    BALANCE_TTL = 60.0
+    COST_CACHE_SIZE = 128
     
     def __init__(self):
         if not settings.DEEPGRAM_API_KEY:
             raise ValueError("DEEPGRAM_API_KEY not set")
         self._project_id: Optional[str] = None
+        # (fetched_at monotonic, balance); balance only needs ~1 minute freshness
+        self._balance_cache: Optional[Tuple[float, Optional[float]]] = None
+        # request_id -> usd; a request's cost never changes once reported
+        self._cost_cache: "OrderedDict[str, float]" = OrderedDict()
+        # Billing lookups run off the transcribe path; hold refs so tasks aren't GC'd mid-flight
+        self._background: Set[asyncio.Task] = set()
+        self._balance_refresh: Optional[asyncio.Task] = None
+        # Shared client: keeps TLS connections to Deepgram alive across calls
+        self._client = httpx.AsyncClient(
+            base_url=self.BASE_URL,
+            http2=True,
+            timeout=httpx.Timeout(120.0, connect=10.0),
+            headers=self._headers(),
+        )
+    
+    async def aclose(self) -> None:
+        """Cancel pending billing lookups and close the shared HTTP connection pool."""
+        for task in list(self._background):
+            task.cancel()
+        await asyncio.gather(*self._background, return_exceptions=True)
+        await self._client.aclose()
+    
+    def _spawn(self, coro) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return task
+    
+    def _cached_balance(self) -> Optional[float]:
+        """Last known balance; kicks off a background refresh once it goes stale."""
+        cached = self._balance_cache
+        stale = not cached or time.monotonic() - cached[0] >= self.BALANCE_TTL
+        if stale and (self._balance_refresh is None or self._balance_refresh.done()):
+            self._balance_refresh = self._spawn(self.get_balance())
+        return cached[1] if cached else None
+    
+    def cached_request_cost(self, request_id: str) -> Optional[float]:
+        return self._cost_cache.get(request_id)
     
     def _headers(self) -> dict:
         return {"Authorization": f"Token {settings.DEEPGRAM_API_KEY}"}
@@ -26,67 +103,67 @@ class DeepgramService:
         if self._project_id:
             return self._project_id
         try:
-            async with httpx.AsyncClient(timeout=10.0) as c:
-                r = await c.get(f"{self.BASE_URL}/projects", headers=self._headers())
-                if r.status_code == 200:
-                    projects = r.json().get("projects", [])
-                    if projects:
-                        self._project_id = projects[0]["project_id"]
+            r = await self._client.get("/projects", timeout=10.0)
+            if r.status_code == 200:
+                projects = r.json().get("projects", [])
+                if projects:
+                    self._project_id = projects[0]["project_id"]
         except Exception as e:
             logger.warning(f"Project ID failed: {e}")
         return self._project_id
     
     async def get_balance(self) -> Optional[float]:
+        cached = self._balance_cache
+        if cached and time.monotonic() - cached[0] < self.BALANCE_TTL:
+            return cached[1]
         pid = await self._get_project_id()
         if not pid:
             return None
         try:
-            async with httpx.AsyncClient(timeout=10.0) as c:
-                r = await c.get(f"{self.BASE_URL}/projects/{pid}/balances", headers=self._headers())
-                if r.status_code == 200:
-                    for b in r.json().get("balances", []):
-                        if float(b.get("amount", 0)) > 0:
-                            return float(b["amount"])
+            r = await self._client.get(f"/projects/{pid}/balances", timeout=10.0)
+            if r.status_code == 200:
+                balance = None
+                for b in r.json().get("balances", []):
+                    if float(b.get("amount", 0)) > 0:
+                        balance = float(b["amount"])
+                        break
+                self._balance_cache = (time.monotonic(), balance)
+                return balance
         except Exception as e:
             logger.warning(f"Balance failed: {e}")
         return None
     
     async def get_request_cost(self, request_id: str) -> Optional[float]:
+        if request_id in self._cost_cache:
+            self._cost_cache.move_to_end(request_id)
+            return self._cost_cache[request_id]
         pid = await self._get_project_id()
         if not pid:
             return None
         try:
-            async with httpx.AsyncClient(timeout=10.0) as c:
-                r = await c.get(f"{self.BASE_URL}/projects/{pid}/requests/{request_id}", headers=self._headers())
-                if r.status_code == 200:
-                    cost = r.json().get("response", {}).get("details", {}).get("usd")
-                    return float(cost) if cost else None
+            r = await self._client.get(f"/projects/{pid}/requests/{request_id}", timeout=10.0)
+            if r.status_code == 200:
+                cost = r.json().get("response", {}).get("details", {}).get("usd")
+                if not cost:
+                    return None
+                self._cost_cache[request_id] = float(cost)
+                if len(self._cost_cache) > self.COST_CACHE_SIZE:
+                    self._cost_cache.popitem(last=False)
+                return float(cost)
         except Exception as e:
             logger.warning(f"Cost failed: {e}")
         return None
     
-    async def transcribe(self, audio_data: bytes, mimetype: str = "audio/wav", language: str = "multi") -> Dict[str, Any]:
+    async def transcribe(self, audio_data: bytes, mimetype: str = "audio/wav", language: str = "multi") -> TranscribeResult:
         """Transcribe audio. Language: en, hi, multi (Hinglish)."""
-        params = {
-            "model": settings.DEEPGRAM_MODEL,
-            "smart_format": "true", "punctuate": "true", "utterances": "true",
-            "detect_entities": "true", "sentiment": "true", "intents": "true", "topics": "true",
-        }
-        
-        if language == "multi":
-            params["detect_language"] = "true"
-        else:
-            params["language"] = language
-        
         try:
-            async with httpx.AsyncClient(timeout=120.0) as c:
-                r = await c.post(
-                    f"{self.BASE_URL}/listen", params=params,
-                    headers={**self._headers(), "Content-Type": mimetype}, content=audio_data
-                )
-                r.raise_for_status()
-                request_id = r.headers.get("dg-request-id")
-                data = r.json()
+            r = await self._client.post(
+                f"/listen?{_listen_query(language)}",
+                headers={"Content-Type": mimetype}, content=audio_data
+            )
+            r.raise_for_status()
+            request_id = r.headers.get("dg-request-id")
+            data = orjson.loads(r.content)
             
             results = data.get("results", {})
             channels = results.get("channels", [])
@@ -97,29 +174,35 @@ class DeepgramService:
             
             duration = data.get("metadata", {}).get("duration", 0.0)
             
+            # Each list is built in one pass; empty tuples as defaults avoid allocating throwaway lists
+            topic_segments = results.get("topics", _EMPTY).get("segments", ())
             transcription = {
                 "fullTranscript": transcript,
                 "utterances": [
                     {"transcript": u.get("transcript", ""), "confidence": u.get("confidence", 0),
                      "start": u.get("start", 0), "end": u.get("end", 0)}
-                    for u in results.get("utterances", [])
+                    for u in results.get("utterances", ())
                 ],
-                "sentiments": [{"sentiment": s.get("sentiment", "")} for s in results.get("sentiments", {}).get("segments", [])],
-                "topics": [t.get("topic", "") for seg in results.get("topics", {}).get("segments", []) for t in seg.get("topics", [])]
+                "sentiments": [{"sentiment": s.get("sentiment", "")} for s in results.get("sentiments", _EMPTY).get("segments", ())],
+                "topics": [
+                    t.get("topic", "")
+                    for t in chain.from_iterable(seg.get("topics", ()) for seg in topic_segments)
+                ]
             }
             
-            cost = await self.get_request_cost(request_id) if request_id else None
-            balance = await self.get_balance()
+            # Cost and balance need extra round-trips; don't hold the response for them.
+            # The cost lands in the cache for later lookup by request id.
+            if request_id:
+                self._spawn(self.get_request_cost(request_id))
             
-            return {
-                "transcript": transcript,
-                "duration": round(duration, 1),
-                "transcription": transcription,
-                "billing": {
-                    "consumed": {"duration_seconds": round(duration, 1), "cost_usd": f"{cost:.5f}" if cost else "N/A"},
-                    "left": {"credits": f"{balance:.2f}" if balance else "N/A"}
-                }
-            }
+            return TranscribeResult(
+                transcript=transcript,
+                duration=duration,
+                transcription=transcription,
+                cost_usd=self.cached_request_cost(request_id) if request_id else None,
+                balance_usd=self._cached_balance(),
+                request_id=request_id,
+            )
         except httpx.HTTPStatusError as e:
             if e.response.status_code == 429:
                 raise RateLimitException("Rate limit exceeded")
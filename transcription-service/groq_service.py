@@ -1,14 +1,53 @@
 """Groq LLM service for transcript formatting and text generation."""
 
 import asyncio
+import httpx
 import logging
-from groq import Groq, RateLimitError
+import orjson
+import pybase64
+from typing import AsyncIterator, Awaitable, List, Optional, Sequence, Union
+from groq import AsyncGroq, RateLimitError
 from config import settings
 from rate_limiter import tracker
 from json_utils import call_with_retry, RateLimitException
+from schemas import FinalTranscript, GeneratedText
 
 logger = logging.getLogger(__name__)
 
+_IMAGE_MAGIC = ((b"\xff\xd8\xff", "image/jpeg"), (b"\x89PNG", "image/png"), (b"GIF8", "image/gif"))
+
+
+def _sniff_image_mime(header: bytes) -> str:
+    """MIME type from an image's leading bytes; defaults to jpeg."""
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "image/webp"
+    for magic, mime in _IMAGE_MAGIC:
+        if header.startswith(magic):
+            return mime
+    return "image/jpeg"
+
+
+def _image_url(img: Union[bytes, bytearray, str]) -> Optional[str]:
+    """Build the image_url for raw bytes, a URL, a data URL or a bare base64 string."""
+    if not img or len(img) < 10:
+        return None
+    if isinstance(img, (bytes, bytearray)):
+        return f"data:{_sniff_image_mime(img[:12])};base64,{pybase64.b64encode(img).decode('ascii')}"
+    if img.startswith(("http://", "https://", "data:")):
+        return img
+    # 16 base64 chars decode to exactly the 12 header bytes we need
+    try:
+        header = pybase64.b64decode(img[:16])
+    except ValueError:
+        header = b""
+    return f"data:{_sniff_image_mime(header)};base64,{img}"
+
+
+def _sse(data: dict, event: Optional[str] = None) -> str:
+    """Encode one server-sent event, optionally named."""
+    payload = f"data: {orjson.dumps(data).decode()}\n\n"
+    return f"event: {event}\n{payload}" if event else payload
+
 
 class GroqService:
     """LLM service via Groq API."""
@@ -16,13 +55,24 @@ class GroqService:
     def __init__(self):
         if not settings.GROQ_API_KEY:
             raise ValueError("GROQ_API_KEY not set")
-        self.client = Groq(api_key=settings.GROQ_API_KEY)
+        # Own the transport so bursts of /format and /prompt reuse warm TLS connections
+        self._http = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+            timeout=httpx.Timeout(60.0, connect=5.0),
+        )
+        self.client = AsyncGroq(api_key=settings.GROQ_API_KEY, http_client=self._http)
     
-    def _build_billing(self, inp: int, out: int, input_cost: float, output_cost: float) -> dict:
-        """Build billing response."""
+    async def aclose(self) -> None:
+        """Close the shared HTTP connection pool."""
+        await self._http.aclose()
+    
+    def _build_billing(self, inp: int, out: int, input_cost: float, output_cost: float, record: bool = True) -> dict:
+        """Build billing response. Cache hits pass record=False since no request was made."""
         total = inp + out
         cost = inp * input_cost + out * output_cost
-        tracker.record(total)
+        if record:
+            tracker.record(total)
         return {
             "consumed": {"input_tokens": inp, "output_tokens": out, "total_tokens": total, "cost_usd": f"{cost:.6f}"},
             "limits": tracker.stats()
@@ -34,39 +84,82 @@ class GroqService:
         result = await call_with_retry(
             self.client, messages, settings.GROQ_FORMAT_MODEL, 0.1,
             "finalTranscript", '{"finalTranscript": "text"}',
-            tracker, settings.GROQ_FORMAT_INPUT_COST, settings.GROQ_FORMAT_OUTPUT_COST, self._build_billing
+            tracker, settings.GROQ_FORMAT_INPUT_COST, settings.GROQ_FORMAT_OUTPUT_COST, self._build_billing,
+            schema=FinalTranscript
         )
         logger.info(f"Format: {result['billing']['consumed']['total_tokens']} tokens")
         return result
     
+    async def format_transcript_stream(self, system_prompt: str, user_prompt: str) -> AsyncIterator[str]:
+        """Start a streamed format call and return its SSE events.
+        The request is sent here, so rate limits raise before any response has started."""
+        messages = [{"role": "system", "content": system_prompt}, {"role": "user", "content": user_prompt}]
+        tracker.check_budget(settings.GROQ_FORMAT_MODEL, system_prompt, user_prompt)
+        try:
+            # Groq rejects response_format together with stream; the prompt still asks for the JSON shape
+            resp = await self.client.chat.completions.with_raw_response.create(
+                messages=messages, model=settings.GROQ_FORMAT_MODEL,
+                temperature=0.1, max_tokens=4096, stream=True
+            )
+            tracker.update_headers(dict(resp.headers), settings.GROQ_FORMAT_MODEL)
+            stream = resp.parse()
+        except RateLimitError:
+            raise RateLimitException("Rate limit exceeded")
+        return self._format_events(stream)
+    
+    async def _format_events(self, stream) -> AsyncIterator[str]:
+        """`data: {"delta": ...}` per content chunk, then `event: done` with billing (or `event: error`).
+        The upstream stream is closed on every exit, including a client disconnect."""
+        inp = out = 0
+        try:
+            async for chunk in stream:
+                if chunk.choices and (delta := chunk.choices[0].delta.content):
+                    yield _sse({"delta": delta})
+                # Groq reports usage on the final chunk under x_groq
+                usage = getattr(getattr(chunk, "x_groq", None), "usage", None)
+                if usage:
+                    inp, out = usage.prompt_tokens, usage.completion_tokens
+        except Exception as e:
+            logger.error(f"Format stream failed: {e}")
+            yield _sse({"detail": str(e)}, event="error")
+            return
+        finally:
+            await stream.close()
+        logger.info(f"Format stream: {inp + out} tokens")
+        yield _sse(
+            self._build_billing(inp, out, settings.GROQ_FORMAT_INPUT_COST, settings.GROQ_FORMAT_OUTPUT_COST),
+            event="done"
+        )
+    
     async def generate_text(self, prompt: str) -> dict:
         """Generate text with JSON validation and retry."""
         result = await call_with_retry(
             self.client, [{"role": "user", "content": prompt}], settings.GROQ_PROMPT_MODEL, 0.2,
             "generatedText", '{"generatedText": "text"}',
-            tracker, settings.GROQ_PROMPT_INPUT_COST, settings.GROQ_PROMPT_OUTPUT_COST, self._build_billing
+            tracker, settings.GROQ_PROMPT_INPUT_COST, settings.GROQ_PROMPT_OUTPUT_COST, self._build_billing,
+            schema=GeneratedText
         )
         logger.info(f"Generate: {result['billing']['consumed']['total_tokens']} tokens")
         return result
     
-    async def generate_with_vision(self, user_query: str, context_text: str = None, images: list = None) -> dict:
-        """Generate text using VLM with images."""
+    async def generate_batch(self, calls: Sequence[Awaitable[dict]]) -> List[Union[dict, BaseException]]:
+        """Run independent generate_* calls concurrently. Results keep input order;
+        a failed call yields its exception instead of cancelling the rest."""
+        return await asyncio.gather(*calls, return_exceptions=True)
+    
+    async def generate_with_vision(
+        self, user_query: str, context_text: str = None, images: Sequence[Union[bytes, bytearray, str]] = None
+    ) -> dict:
+        """Generate text using VLM with images (raw bytes, URLs or base64 strings)."""
+        tracker.check_budget(settings.GROQ_PROMPT_MODEL, user_query, context_text)
         try:
             content = []
             
-            # Add images
+            # Add images; encoding raw uploads is CPU-bound, so it runs off the event loop
             for img in (images or [])[:3]:
-                if not img or len(img) < 10:
-                    continue
-                if img.startswith(("http://", "https://", "data:")):
-                    img_url = img
-                elif img.startswith("/9j/"):
-                    img_url = f"data:image/jpeg;base64,{img}"
-                elif img.startswith("iVBOR"):
-                    img_url = f"data:image/png;base64,{img}"
-                else:
-                    img_url = f"data:image/jpeg;base64,{img}"
-                content.append({"type": "image_url", "image_url": {"url": img_url}})
+                img_url = await asyncio.to_thread(_image_url, img) if isinstance(img, (bytes, bytearray)) else _image_url(img)
+                if img_url:
+                    content.append({"type": "image_url", "image_url": {"url": img_url}})
             
             # Add text
             text = "OUTPUT ONLY what is asked. NO intro phrases.\n\n"
@@ -75,16 +168,13 @@ class GroqService:
             text += f"TASK: {user_query}"
             content.append({"type": "text", "text": text})
             
-            # Call VLM (no JSON mode) - run in threadpool to avoid blocking
-            def call_vlm():
-                resp = self.client.chat.completions.with_raw_response.create(
-                    messages=[{"role": "user", "content": content}],
-                    model=settings.GROQ_PROMPT_MODEL, temperature=0.7, max_tokens=4096
-                )
-                tracker.update_headers(dict(resp.headers))
-                return resp.parse()
-            
-            comp = await asyncio.to_thread(call_vlm)
+            # Call VLM (no JSON mode)
+            resp = await self.client.chat.completions.with_raw_response.create(
+                messages=[{"role": "user", "content": content}],
+                model=settings.GROQ_PROMPT_MODEL, temperature=0.7, max_tokens=4096
+            )
+            tracker.update_headers(dict(resp.headers), settings.GROQ_PROMPT_MODEL)
+            comp = resp.parse()
             
             inp = comp.usage.prompt_tokens if comp.usage else 0
             out = comp.usage.completion_tokens if comp.usage else 0
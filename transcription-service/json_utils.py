@@ -1,16 +1,24 @@
 """JSON parsing and LLM response handling."""
 
 import asyncio
-import json
 import logging
+import orjson
+from functools import lru_cache
+from typing import Optional, Type
+from pydantic import BaseModel
 from groq import RateLimitError
+from config import settings
+from llm_cache import LLMCache, llm_cache
 
 logger = logging.getLogger(__name__)
 
 
 class RateLimitException(Exception):
     """API rate limit hit - return 429."""
-    pass
+    
+    def __init__(self, message: str = "Rate limit exceeded", retry_after: float = None):
+        super().__init__(message)
+        self.retry_after = retry_after
 
 
 class HallucinationException(Exception):
@@ -21,11 +29,11 @@ class HallucinationException(Exception):
 def parse_json(content: str, expected_key: str = None) -> dict:
     """Parse JSON from LLM response. Raises ValueError if invalid."""
     try:
-        result = json.loads(content)
+        result = orjson.loads(content)
         if expected_key and expected_key not in result:
             raise ValueError(f"Missing key: {expected_key}")
         return result
-    except json.JSONDecodeError as e:
+    except orjson.JSONDecodeError as e:
         raise ValueError(f"Invalid JSON: {e}")
 
 
@@ -38,17 +46,50 @@ REQUIRED: {expected_format}
 Return ONLY valid JSON."""
 
 
+RETRY_BACKOFF = 1.0
+
+_JSON_OBJECT = {"type": "json_object"}
+
+
+@lru_cache(maxsize=32)
+def _response_format(model: str, schema: Optional[Type[BaseModel]], name: str) -> dict:
+    """json_schema constraint where the model supports it (strict only where Groq enforces it),
+    else plain JSON mode."""
+    if schema is None or model not in settings.json_schema_models:
+        return _JSON_OBJECT
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": name,
+            "schema": schema.model_json_schema(),
+            "strict": model in settings.strict_schema_models,
+        },
+    }
+
+
 async def call_with_retry(client, messages, model, temp, expected_key, expected_format, 
-                          tracker, input_cost, output_cost, build_billing):
-    """Call LLM with JSON validation and retry on failure. Runs sync calls in threadpool."""
+                          tracker, input_cost, output_cost, build_billing, schema=None):
+    """Call LLM with JSON validation and retry on failure. Expects an AsyncGroq client.
+    With a pydantic `schema`, supporting models are constrained to it so retries are rare.
+    Low-temperature calls are served from llm_cache when the exact request was seen before;
+    only cache misses are charged against the local rate budget."""
     total_in, total_out = 0, 0
+    cache_key = None
+    if temp <= settings.LLM_CACHE_MAX_TEMP:
+        cache_key = LLMCache.make_key(model, temp, expected_key, messages)
+        cached = llm_cache.get(cache_key)
+        if cached is not None:
+            return {"result": dict(cached), "billing": build_billing(0, 0, input_cost, output_cost, record=False)}
+    
+    response_format = _response_format(model, schema, expected_key)
     
-    def call_llm(msgs):
-        resp = client.chat.completions.with_raw_response.create(
+    async def call_llm(msgs):
+        tracker.check_budget(model, *(m["content"] for m in msgs))
+        resp = await client.chat.completions.with_raw_response.create(
             messages=msgs, model=model, temperature=temp,
-            max_tokens=4096, response_format={"type": "json_object"}
+            max_tokens=4096, response_format=response_format
         )
-        tracker.update_headers(dict(resp.headers))
+        tracker.update_headers(dict(resp.headers), model)
         comp = resp.parse()
         return (
             comp.choices[0].message.content,
@@ -57,22 +98,27 @@ async def call_with_retry(client, messages, model, temp, expected_key, expected_
         )
     
     try:
-        content, inp, out = await asyncio.to_thread(call_llm, messages)
+        content, inp, out = await call_llm(messages)
         total_in, total_out = inp, out
         
         try:
             result = parse_json(content, expected_key)
+            if cache_key:
+                llm_cache.set(cache_key, result)
             return {"result": result, "billing": build_billing(total_in, total_out, input_cost, output_cost)}
         except ValueError as e:
             logger.warning(f"JSON parse failed, retrying: {e}")
             fix = make_fix_prompt(content, str(e), expected_format)
-            retry_content, ri, ro = await asyncio.to_thread(call_llm, [{"role": "user", "content": fix}])
+            await asyncio.sleep(RETRY_BACKOFF)
+            retry_content, ri, ro = await call_llm([{"role": "user", "content": fix}])
             total_in += ri
             total_out += ro
             
             try:
                 result = parse_json(retry_content, expected_key)
                 logger.info(f"Recovered via retry")
+                if cache_key:
+                    llm_cache.set(cache_key, result)
                 return {"result": result, "billing": build_billing(total_in, total_out, input_cost, output_cost)}
             except ValueError:
                 raise HallucinationException("LLM failed to produce valid JSON after retry")
@@ -0,0 +1,55 @@
+"""Content-addressed cache for deterministic LLM responses."""
+
+import hashlib
+import orjson
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+from config import settings
+
+
+class LLMCache:
+    """In-process TTL + LRU cache keyed by a hash of the full LLM request."""
+    
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # key -> (expires_at monotonic, value); ordered oldest-used first
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def make_key(model: str, temp: float, expected_key: str, messages: list) -> str:
+        payload = orjson.dumps(
+            {"m": model, "t": temp, "k": expected_key, "msgs": messages}, option=orjson.OPT_SORT_KEYS
+        )
+        return hashlib.sha256(payload).hexdigest()
+    
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+    
+    def set(self, key: str, value: Any):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+    
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+llm_cache = LLMCache(settings.LLM_CACHE_SIZE, settings.LLM_CACHE_TTL)
@@ -1,27 +1,30 @@
 """Transcription Microservice."""
 
+import hmac
 import logging
-import mimetypes
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 
-from routes import router
+from routes import router, deepgram, groq
 from config import settings
 
 logging.basicConfig(level=logging.INFO)
-mimetypes.add_type("audio/ogg", ".opus")
 
-app = FastAPI(title="Transcription Service")
+# Paths reachable without the internal API key
+_PUBLIC_PATHS = frozenset(("/docs", "/openapi.json", "/"))
+
+app = FastAPI(title="Transcription Service", default_response_class=ORJSONResponse)
 
 
 @app.middleware("http")
 async def verify_internal_key(request: Request, call_next):
-    if settings.INTERNAL_API_KEY:
-        if request.url.path not in ["/docs", "/openapi.json", "/"]:
-            if request.headers.get("x-internal-api-key") != settings.INTERNAL_API_KEY:
-                return JSONResponse(status_code=403, content={"detail": "Forbidden"})
+    if settings.INTERNAL_API_KEY and request.url.path not in _PUBLIC_PATHS:
+        # Constant-time compare so response timing doesn't leak how much of the key matched
+        supplied = request.headers.get("x-internal-api-key", "")
+        if not hmac.compare_digest(supplied.encode(), settings.INTERNAL_API_KEY.encode()):
+            return ORJSONResponse(status_code=403, content={"detail": "Forbidden"})
     return await call_next(request)
 
 
@@ -36,6 +39,12 @@ app.add_middleware(
 app.include_router(router)
 
 
+@app.on_event("shutdown")
+async def close_clients():
+    await deepgram.aclose()
+    await groq.aclose()
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=settings.TRANSCRIPTION_SERVICE_PORT, reload=True)
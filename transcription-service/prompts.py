@@ -1,6 +1,10 @@
 """LLM prompts for transcript formatting and text generation."""
 
-from typing import List, Dict, Any, Optional, Tuple
+import re
+from functools import lru_cache
+from itertools import islice
+from typing import Callable, List, Dict, Optional, Tuple
+from schemas import BatchData
 
 SYSTEM_PROMPT = """You are a transcription formatter. Clean up messy speech into perfect written text.
 
@@ -11,8 +15,7 @@ RULES:
 4. NUMBERS: words to digits, add % or $ as appropriate
 5. QUOTES: "quote X unquote" → 'X'
 6. GRAMMAR: fix tense, punctuation, capitalization
-7. KEYWORDS: apply replacements if provided
-8. HINGLISH: keep Hindi in romanized form, don't translate
+7. HINGLISH: keep Hindi in romanized form, don't translate
 
 OUTPUT: JSON with finalTranscript. Use \\n for newlines."""
 
@@ -27,30 +30,46 @@ RULES:
 
 OUTPUT: JSON with generatedText only."""
 
+# Constant prompt pieces, joined around the per-request text
+_FORMAT_HEAD = 'Format: "'
+_FORMAT_TAIL = '"\n\nReturn: {"finalTranscript": "..."}'
+_GENERATOR_HEAD = GENERATOR_PROMPT + "\n"
+_GENERATOR_TAIL = '\n\nReturn: {"generatedText": "..."}'
 
-def build_llm_prompt(batches: List[Dict[str, Any]], keyword_preferences: Optional[Dict[str, str]] = None) -> Tuple[str, str]:
+
+def build_llm_prompt(batches: List[BatchData], keyword_preferences: Optional[Dict[str, str]] = None) -> Tuple[str, str]:
     """Build system and user prompts from batches."""
     if not batches:
         raise ValueError("No batches provided")
     
-    raw_texts = []
-    for batch in batches:
-        text = batch.get("transcription", {}).get("fullTranscript", "")
-        if text:
-            raw_texts.append(text)
-    
-    raw_transcript = " ".join(raw_texts)
-    
-    keyword_section = ""
+    raw_transcript = " ".join(text for batch in batches if (text := batch.transcription.fullTranscript))
     if keyword_preferences:
-        pairs = list(keyword_preferences.items())[:100]
-        keyword_section = "\n\nREPLACE: " + ", ".join([f'"{k}"→"{v}"' for k, v in pairs])
-    
-    user_prompt = f'Format: "{raw_transcript}"{keyword_section}\n\nReturn: {{"finalTranscript": "..."}}'
-    return SYSTEM_PROMPT, user_prompt
+        # Replacements are applied here rather than left to the LLM
+        # Values are inserted literally, so anything but a non-empty string is skipped
+        pairs = tuple(
+            (k, v) for k, v in islice(keyword_preferences.items(), 100)
+            if k and isinstance(v, str) and v
+        )
+        if pairs:
+            raw_transcript = _keyword_replacer(pairs)(raw_transcript)
+    return SYSTEM_PROMPT, "".join((_FORMAT_HEAD, raw_transcript, _FORMAT_TAIL))
+
+
+@lru_cache(maxsize=128)
+def _keyword_replacer(pairs: Tuple[Tuple[str, str], ...]) -> Callable[[str], str]:
+    """One compiled alternation for all keywords: whole words only, case-insensitive,
+    longest first so "b tech" wins over "b"."""
+    # casefold, not lower: IGNORECASE also matches e.g. "ſ" for "s", which lower() leaves alone
+    mapping = {k.casefold(): v for k, v in pairs}
+    pattern = re.compile(
+        r"(?<!\w)(?:" + "|".join(re.escape(k) for k in sorted(mapping, key=len, reverse=True)) + r")(?!\w)",
+        re.IGNORECASE,
+    )
+    return lambda text: pattern.sub(lambda m: mapping.get(m.group(0).casefold(), m.group(0)), text)
 
 
 def build_generator_prompt(user_query: str, context_text: Optional[str] = None) -> str:
     """Build prompt for text generation."""
-    ctx = f"\nCONTEXT: {context_text}\n" if context_text else ""
-    return f"{GENERATOR_PROMPT}\n{ctx}REQUEST: {user_query}\n\nReturn: {{\"generatedText\": \"...\"}}"
+    if context_text:
+        return "".join((_GENERATOR_HEAD, "\nCONTEXT: ", context_text, "\nREQUEST: ", user_query, _GENERATOR_TAIL))
+    return "".join((_GENERATOR_HEAD, "REQUEST: ", user_query, _GENERATOR_TAIL))
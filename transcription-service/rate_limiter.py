@@ -3,61 +3,133 @@
 import time
 import datetime
 import threading
-from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Optional
+from config import settings
+from json_utils import RateLimitException
+from llm_cache import llm_cache
+
+
+@dataclass(slots=True)
+class _ModelBudget:
+    """Local admission state for one model; Groq enforces its limits per model."""
+    rpm_tokens: float
+    rpm_at: float
+    tpm_limit: int = 0
+    # Local estimate of remaining TPM: seeded from this model's headers, reduced by admitted calls
+    tpm_estimate: float = 0.0
+    tpm_at: float = 0.0
 
 
 class RateLimitTracker:
-    """Thread-safe rate limit tracking from headers + calculated RPM/TPD."""
+    """Thread-safe rate limit tracking from headers + token-bucket RPM / TPD.
+    Per-model buckets pace admission (try_acquire reserves from them); a per-second ring
+    of counts reports exact requests in the last minute."""
     
-    RPM_LIMIT = 30
+    WINDOW = 60
     
     def __init__(self):
         self._lock = threading.Lock()
-        self.start_time = datetime.datetime.now()
-        self._request_times: deque = deque()
+        self._start_mono = time.monotonic()
+        self.rpm_limit = settings.GROQ_RPM_LIMIT
+        self._refill_per_sec = self.rpm_limit / 60.0
+        self._budgets: Dict[str, _ModelBudget] = {}
+        # Slot i counts requests made in the whole monotonic second stored in _ring_ts[i]
+        self._ring = [0] * self.WINDOW
+        self._ring_ts = [-1] * self.WINDOW
         self._tokens_today = 0
         self._today = datetime.date.today()
+        # Last values Groq sent, for display
         self.rpd_limit = 0
         self.rpd_remaining = 0
         self.tpm_limit = 0
         self.tpm_remaining = 0
     
+    def _budget(self, model: str, now: float) -> _ModelBudget:
+        budget = self._budgets.get(model)
+        if budget is None:
+            budget = self._budgets[model] = _ModelBudget(float(self.rpm_limit), now)
+        return budget
+    
     def record(self, tokens: int):
         """Record request for RPM/TPD tracking."""
         with self._lock:
-            now = time.time()
-            self._request_times.append(now)
-            while self._request_times and self._request_times[0] < now - 60:
-                self._request_times.popleft()
+            # The RPM bucket was already charged by try_acquire; only count the request here
+            second = int(time.monotonic())
+            slot = second % self.WINDOW
+            if self._ring_ts[slot] != second:
+                self._ring[slot] = 0
+                self._ring_ts[slot] = second
+            self._ring[slot] += 1
             
             if datetime.date.today() != self._today:
                 self._tokens_today = 0
                 self._today = datetime.date.today()
             self._tokens_today += tokens
     
-    def update_headers(self, headers: dict):
-        """Update limits from Groq response headers."""
+    def update_headers(self, headers: dict, model: str):
+        """Update limits from Groq response headers for `model`."""
         with self._lock:
             try:
-                self.rpd_limit = int(headers.get("x-ratelimit-limit-requests", 0))
-                self.rpd_remaining = int(headers.get("x-ratelimit-remaining-requests", 0))
-                self.tpm_limit = int(headers.get("x-ratelimit-limit-tokens", 0))
-                self.tpm_remaining = int(headers.get("x-ratelimit-remaining-tokens", 0))
+                rpd_limit = int(headers.get("x-ratelimit-limit-requests", 0))
+                rpd_remaining = int(headers.get("x-ratelimit-remaining-requests", 0))
+                tpm_limit = int(headers.get("x-ratelimit-limit-tokens", 0))
+                tpm_remaining = int(headers.get("x-ratelimit-remaining-tokens", 0))
             except (ValueError, TypeError):
-                pass
+                return
+            self.rpd_limit, self.rpd_remaining = rpd_limit, rpd_remaining
+            self.tpm_limit, self.tpm_remaining = tpm_limit, tpm_remaining
+            now = time.monotonic()
+            budget = self._budget(model, now)
+            budget.tpm_limit = tpm_limit
+            budget.tpm_estimate, budget.tpm_at = float(tpm_remaining), now
     
-    def stats(self) -> dict:
-        """Get current rate limit stats."""
+    def try_acquire(self, model: str, estimated_tokens: int) -> Optional[float]:
+        """Reserve local budget for one call to `model` before hitting Groq. Returns seconds to wait
+        (nothing reserved), or None once the RPM token and estimated TPM have been taken."""
         with self._lock:
-            rpm_used = len(self._request_times)
-            uptime = str(datetime.datetime.now() - self.start_time).split('.')[0]
-            return {
-                "rpd": {"limit": self.rpd_limit, "remaining": self.rpd_remaining},
-                "tpm": {"limit": self.tpm_limit, "remaining": self.tpm_remaining},
-                "rpm": {"limit": self.RPM_LIMIT, "remaining": max(0, self.RPM_LIMIT - rpm_used), "used": rpm_used},
-                "tpd": {"used": self._tokens_today},
-                "uptime": uptime
-            }
+            now = time.monotonic()
+            budget = self._budget(model, now)
+            wait = 0.0
+            rpm_tokens = min(float(self.rpm_limit), budget.rpm_tokens + (now - budget.rpm_at) * self._refill_per_sec)
+            if rpm_tokens < 1:
+                wait = (1 - rpm_tokens) / self._refill_per_sec
+            tpm_limit = budget.tpm_limit
+            check_tpm = tpm_limit and estimated_tokens <= tpm_limit
+            if check_tpm:
+                # Header snapshot ages; assume the per-minute token budget refills linearly since then
+                per_sec = tpm_limit / 60.0
+                tpm_tokens = min(tpm_limit, budget.tpm_estimate + (now - budget.tpm_at) * per_sec)
+                if tpm_tokens < estimated_tokens:
+                    wait = max(wait, (estimated_tokens - tpm_tokens) / per_sec)
+            if wait:
+                return wait
+            budget.rpm_tokens, budget.rpm_at = rpm_tokens - 1, now
+            if check_tpm:
+                budget.tpm_estimate, budget.tpm_at = tpm_tokens - estimated_tokens, now
+            return None
+    
+    def check_budget(self, model: str, *texts: Optional[str]):
+        """Reserve one call of `model`'s local budget (~4 chars per token) or raise RateLimitException."""
+        wait = self.try_acquire(model, sum(len(t) for t in texts if t) // 4)
+        if wait is not None:
+            raise RateLimitException(retry_after=wait)
+    
+    def stats(self) -> dict:
+        """Get current rate limit stats. Lock-free: each field is read atomically."""
+        cutoff = int(time.monotonic()) - self.WINDOW
+        rpm_used = sum(c for c, ts in zip(self._ring, self._ring_ts) if ts > cutoff)
+        h, s = divmod(int(time.monotonic() - self._start_mono), 3600)
+        m, s = divmod(s, 60)
+        uptime = f"{h}:{m:02d}:{s:02d}"
+        return {
+            "rpd": {"limit": self.rpd_limit, "remaining": self.rpd_remaining},
+            "tpm": {"limit": self.tpm_limit, "remaining": self.tpm_remaining},
+            "rpm": {"limit": self.rpm_limit, "remaining": max(0, self.rpm_limit - rpm_used), "used": rpm_used},
+            "tpd": {"used": self._tokens_today},
+            "cache": llm_cache.stats(),
+            "uptime": uptime
+        }
 
 
 tracker = RateLimitTracker()
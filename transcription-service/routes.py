@@ -1,24 +1,94 @@
 """API Routes for Transcription Service."""
 
 import logging
-import mimetypes
-from typing import Optional
+import math
+from typing import Awaitable, Optional
 
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, UploadFile, File, HTTPException, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ValidationError
 
-from schemas import FormatRequest, PromptRequest
-from deepgram_service import DeepgramService
+from schemas import FormatRequest, PromptRequest, PromptBatchRequest
+from deepgram_service import DeepgramService, TranscribeResult
 from groq_service import GroqService
 from json_utils import RateLimitException, HallucinationException
 from prompts import build_llm_prompt, build_generator_prompt
+from config import settings
 
 logger = logging.getLogger(__name__)
 
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+# Audio types by file extension, for clients that upload as application/octet-stream
+_MIME = {
+    "opus": "audio/ogg", "ogg": "audio/ogg", "wav": "audio/wav", "mp3": "audio/mpeg",
+    "m4a": "audio/mp4", "webm": "audio/webm", "flac": "audio/flac",
+}
+
 deepgram = DeepgramService()
 groq = GroqService()
 router = APIRouter()
 
 
+def _format_transcribe_billing(result: TranscribeResult, duration: float) -> dict:
+    """Render Deepgram billing numbers for the API response."""
+    return {
+        "consumed": {
+            "duration_seconds": duration,
+            "cost_usd": f"{result.cost_usd:.5f}" if result.cost_usd else "N/A",
+            "request_id": result.request_id
+        },
+        "left": {"credits": f"{result.balance_usd:.2f}" if result.balance_usd else "N/A"}
+    }
+
+
+def _rate_limited(e: RateLimitException) -> HTTPException:
+    headers = {"Retry-After": str(math.ceil(e.retry_after))} if e.retry_after else None
+    return HTTPException(
+        429, detail={"code": "agent.rate_limited", "message": "Rate limit exceeded"}, headers=headers
+    )
+
+
+async def _parse_body(raw: Request, model: type[BaseModel]) -> BaseModel:
+    """Validate the raw JSON body in one pass (pydantic-core parses and validates together)."""
+    try:
+        return model.model_validate_json(await raw.body())
+    except ValidationError as e:
+        # Match FastAPI's own body errors, whose loc starts with "body"
+        raise RequestValidationError(
+            [{**err, "loc": ("body", *err["loc"])} for err in e.errors(include_url=False)]
+        )
+
+
+def _request_body_doc(model: type[BaseModel]) -> dict:
+    """OpenAPI requestBody for routes that validate the raw body themselves.
+    Nested model refs are inlined since pydantic's #/$defs/... don't resolve inside an OpenAPI doc."""
+    schema = model.model_json_schema()
+    defs = schema.pop("$defs", {})
+    
+    def inline(node):
+        if isinstance(node, dict):
+            if "$ref" in node:
+                return inline(defs[node["$ref"].rsplit("/", 1)[-1]])
+            return {k: inline(v) for k, v in node.items()}
+        if isinstance(node, list):
+            return [inline(v) for v in node]
+        return node
+    
+    return {"requestBody": {"content": {"application/json": {"schema": inline(schema)}}, "required": True}}
+
+
+async def _read_upload(upload: UploadFile, limit: int) -> bytearray:
+    """Read an upload in chunks, rejecting it with 413 as soon as it passes `limit` bytes."""
+    buf = bytearray()
+    while chunk := await upload.read(UPLOAD_CHUNK_SIZE):
+        buf += chunk
+        if len(buf) > limit:
+            raise HTTPException(413, f"Image '{upload.filename}' exceeds {limit} bytes")
+    return buf
+
+
 @router.get("/")
 async def root():
     return {"status": "running"}
@@ -34,17 +104,18 @@ async def transcribe(
         audio = await file.read()
         mime = file.content_type
         if not mime or mime == "application/octet-stream":
-            mime, _ = mimetypes.guess_type(file.filename or "") or ("audio/wav", None)
+            ext = (file.filename or "").rsplit(".", 1)[-1].lower()
+            mime = _MIME.get(ext, "audio/wav")
         
-        result = await deepgram.transcribe(audio, mime or "audio/wav", language)
-        duration = result.get("duration", 20)
+        result = await deepgram.transcribe(audio, mime, language)
+        duration = round(result.duration, 1)
         if end_time is None:
             end_time = start_time + duration
         
         return {
             "chunk": {"startTime": start_time, "endTime": end_time, "duration": duration},
-            "transcription": result.get("transcription", {}),
-            "billing": result.get("billing")
+            "transcription": result.transcription,
+            "billing": _format_transcribe_billing(result, duration)
         }
     except RateLimitException:
         raise HTTPException(429, "Rate limit exceeded")
@@ -53,17 +124,24 @@ async def transcribe(
         raise HTTPException(500, str(e))
 
 
-@router.post("/format")
-async def format_transcript(request: FormatRequest):
-    """Format batches into final transcript."""
+@router.get("/transcribe/{request_id}/cost")
+async def transcribe_cost(request_id: str):
+    """Cost of a past transcription; looked up in the background after /transcribe."""
+    cost = await deepgram.get_request_cost(request_id)
+    return {"request_id": request_id, "cost_usd": f"{cost:.5f}" if cost else "N/A"}
+
+
+@router.post("/format", openapi_extra=_request_body_doc(FormatRequest))
+async def format_transcript(raw: Request):
+    """Format batches into final transcript. Body: FormatRequest."""
+    request = await _parse_body(raw, FormatRequest)
     if not request.batches:
         raise HTTPException(400, "No batches")
     try:
-        batches = [b.model_dump() for b in request.batches]
-        system_prompt, user_prompt = build_llm_prompt(batches, request.keyword_preferences)
+        system_prompt, user_prompt = build_llm_prompt(request.batches, request.keyword_preferences)
         return await groq.format_transcript(system_prompt, user_prompt)
-    except RateLimitException:
-        raise HTTPException(429, "Rate limit exceeded")
+    except RateLimitException as e:
+        raise _rate_limited(e)
     except HallucinationException:
         raise HTTPException(500, "LLM produced invalid response")
     except Exception as e:
@@ -71,28 +149,53 @@ async def format_transcript(request: FormatRequest):
         raise HTTPException(500, str(e))
 
 
+@router.post("/format/stream", openapi_extra=_request_body_doc(FormatRequest))
+async def format_transcript_stream(raw: Request):
+    """Format batches, streaming the LLM output as server-sent events. Body: FormatRequest."""
+    request = await _parse_body(raw, FormatRequest)
+    if not request.batches:
+        raise HTTPException(400, "No batches")
+    try:
+        system_prompt, user_prompt = build_llm_prompt(request.batches, request.keyword_preferences)
+        events = await groq.format_transcript_stream(system_prompt, user_prompt)
+    except RateLimitException as e:
+        raise _rate_limited(e)
+    except Exception as e:
+        logger.error(f"Format stream: {e}")
+        raise HTTPException(500, str(e))
+    return StreamingResponse(events, media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+def _prompt_call(request: PromptRequest) -> Awaitable[dict]:
+    """Pick the VLM or text path for a prompt request (placeholder "string" values are ignored)."""
+    valid_images = [
+        img for img in (request.context_images or [])
+        if img and img != "string" and (img.startswith("http") or len(img) > 50)
+    ][:3]
+    
+    ctx = request.context_text if request.context_text != "string" else None
+    if valid_images:
+        return groq.generate_with_vision(request.user_query, ctx, valid_images)
+    return groq.generate_text(build_generator_prompt(request.user_query, ctx))
+
+
+def _batch_error(e: BaseException) -> dict:
+    if isinstance(e, RateLimitException):
+        return {"code": "agent.rate_limited", "message": "Rate limit exceeded"}
+    if isinstance(e, HallucinationException):
+        return {"message": "LLM produced invalid response"}
+    return {"message": str(e)}
+
+
 @router.post("/prompt")
 async def generate_text(request: PromptRequest):
     """Generate text from query + context."""
     if not request.user_query:
         raise HTTPException(400, "No user_query")
     try:
-        valid_images = [
-            img for img in (request.context_images or [])
-            if img and img != "string" and (img.startswith("http") or len(img) > 50)
-        ][:3]
-        
-        if valid_images:
-            return await groq.generate_with_vision(
-                request.user_query,
-                request.context_text if request.context_text != "string" else None,
-                valid_images
-            )
-        else:
-            ctx = request.context_text if request.context_text != "string" else None
-            return await groq.generate_text(build_generator_prompt(request.user_query, ctx))
-    except RateLimitException:
-        raise HTTPException(429, "Rate limit exceeded")
+        return await _prompt_call(request)
+    except RateLimitException as e:
+        raise _rate_limited(e)
     except HallucinationException:
         raise HTTPException(500, "LLM produced invalid response")
     except Exception as e:
@@ -100,6 +203,26 @@ async def generate_text(request: PromptRequest):
         raise HTTPException(500, str(e))
 
 
+@router.post("/prompt/batch")
+async def generate_text_batch(request: PromptBatchRequest):
+    """Run independent prompts concurrently. Results keep request order; failures are per item."""
+    if not request.prompts:
+        raise HTTPException(400, "No prompts")
+    if not all(p.user_query for p in request.prompts):
+        raise HTTPException(400, "No user_query")
+    # Each item reserves its own rate budget; refusals come back as per-item rate_limited errors
+    results = await groq.generate_batch([_prompt_call(p) for p in request.prompts])
+    for r in results:
+        if isinstance(r, BaseException):
+            logger.error(f"Prompt batch item: {r}")
+    return {
+        "results": [
+            {"error": _batch_error(r)} if isinstance(r, BaseException) else r
+            for r in results
+        ]
+    }
+
+
 @router.post("/prompt/upload")
 async def generate_with_upload(
     user_query: str, context_text: Optional[str] = None,
@@ -108,16 +231,15 @@ async def generate_with_upload(
     """Generate text with uploaded images."""
     if not user_query:
         raise HTTPException(400, "No user_query")
+    # Raw bytes; the service sniffs the type and base64-encodes once when building the request
+    image_data = [await _read_upload(f, settings.MAX_IMAGE_UPLOAD_BYTES) for f in images[:3]]
     try:
-        import base64
-        image_b64 = [base64.b64encode(await f.read()).decode() for f in images[:3]]
-        
-        if image_b64:
-            return await groq.generate_with_vision(user_query, context_text, image_b64)
+        if image_data:
+            return await groq.generate_with_vision(user_query, context_text, image_data)
         else:
             return await groq.generate_text(build_generator_prompt(user_query, context_text))
-    except RateLimitException:
-        raise HTTPException(429, "Rate limit exceeded")
+    except RateLimitException as e:
+        raise _rate_limited(e)
     except HallucinationException:
         raise HTTPException(500, "LLM produced invalid response")
     except Exception as e:
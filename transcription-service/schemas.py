@@ -1,7 +1,7 @@
 """Pydantic schemas for request/response models."""
 
-from typing import List, Optional
-from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class ChunkInfo(BaseModel):
@@ -31,10 +31,26 @@ class BatchData(BaseModel):
 
 class FormatRequest(BaseModel):
     batches: List[BatchData]
-    keyword_preferences: Optional[dict] = Field(None, example={"btech": "B.Tech"})
+    keyword_preferences: Optional[Dict[str, str]] = Field(None, example={"btech": "B.Tech"})
 
 
 class PromptRequest(BaseModel):
     user_query: str
     context_text: Optional[str] = None
     context_images: Optional[List[str]] = Field(None, description="URLs or base64 images (max 3)")
+
+
+class PromptBatchRequest(BaseModel):
+    prompts: List[PromptRequest] = Field(..., max_length=10, description="Independent prompts, run concurrently")
+
+
+class FinalTranscript(BaseModel):
+    """LLM output schema for /format (strict: no extra keys)."""
+    model_config = ConfigDict(extra="forbid")
+    finalTranscript: str
+
+
+class GeneratedText(BaseModel):
+    """LLM output schema for /prompt (strict: no extra keys)."""
+    model_config = ConfigDict(extra="forbid")
+    generatedText: str